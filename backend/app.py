@@ -8,15 +8,24 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    CORS(app)
+    # The bits feed returns its next-page cursor in a header
+    CORS(app, expose_headers=["X-Next-Cursor"])
 
     db.init_app(app)
     migrate.init_app(app, db)
 
-    from .models import User, Course, Review, Bit  # ensure models are registered
+    from .models import User, Course, Review, Bit, Recommendation, TimelineEntry, BitLike  # ensure models are registered
     from .routes import register_routes
     register_routes(app)
 
+    from .routes import timelines, bulk_courses, course_embeddings
+    timelines.register_commands(app)
+    bulk_courses.register_commands(app)
+    course_embeddings.register_commands(app)
+
+    from . import query_plans
+    query_plans.register_commands(app)
+
     return app
 
 
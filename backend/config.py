@@ -5,4 +5,23 @@ load_dotenv()
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Similar-course table written by rec_sys/neighbours.py
+    NEIGHBOURS_PATH = os.getenv("NEIGHBOURS_PATH", "neighbours.npz")
+
+    # Recommender snapshot (catalog + embeddings) written by rec_sys/app.py
+    REC_SNAPSHOT_PATH = os.getenv("REC_SNAPSHOT_PATH", "recommender_snapshot.npz")
+
+    # Serve the bits feed from per-user timelines filled on write
+    BIT_TIMELINES = os.getenv("BIT_TIMELINES", "false").lower() in ("1", "true", "yes")
+
+    # How often buffered like counts are written to bit.like_count
+    LIKE_FLUSH_INTERVAL_MS = int(os.getenv("LIKE_FLUSH_INTERVAL_MS", "500"))
+
+    # Course vector search: "auto" uses the pgvector table when it exists, "numpy" always scans blobs
+    VECTOR_SEARCH = os.getenv("VECTOR_SEARCH", "auto")
+
+    # Response cache for hot reads: "lru" (per process), a redis:// URL (shared) or "off"
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "lru")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
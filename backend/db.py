@@ -1,5 +1,7 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+# Keep migrations next to the models whatever directory `flask db` runs from
+migrate = Migrate(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"))
@@ -0,0 +1,34 @@
+"""user recommendation vectors
+
+user.embedding holds the float32 vector nudged online by save/like events;
+user.profile_version is bumped whenever anything feeding recommendations
+changes. Existing users start at version 0.
+
+Revision ID: 0002_user_vectors
+Revises: 0001_baseline
+Create Date: 2026-10-19 14:49:05.310221
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_user_vectors'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embedding', sa.LargeBinary(), nullable=True))
+        # The server default only fills existing rows; the model sets it on insert
+        batch_op.add_column(sa.Column('profile_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.alter_column('profile_version', existing_type=sa.Integer(), server_default=None)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('profile_version')
+        batch_op.drop_column('embedding')
@@ -0,0 +1,46 @@
+"""materialized recommendations
+
+- course.updated_at: row version, feeds the catalog version
+- recommendations: each user's ranked courses, with the profile, catalog
+  and model versions they were computed from
+
+Revision ID: 0003_recommendations
+Revises: 0002_user_vectors
+Create Date: 2026-10-19 14:49:31.842760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_recommendations'
+down_revision = '0002_user_vectors'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.create_table('recommendations',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('profile_version', sa.Integer(), nullable=False),
+    sa.Column('catalog_version', sa.String(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('recommendations')
+
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
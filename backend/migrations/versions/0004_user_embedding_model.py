@@ -0,0 +1,29 @@
+"""user embedding model
+
+The embedding model user.embedding lives in, so vectors from another model
+can be discarded after a re-embed. Existing vectors are left untagged.
+
+Revision ID: 0004_user_embedding_model
+Revises: 0003_recommendations
+Create Date: 2026-10-19 14:50:12.675903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_user_embedding_model'
+down_revision = '0003_recommendations'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embedding_model', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('embedding_model')
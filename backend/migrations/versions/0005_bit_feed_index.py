@@ -0,0 +1,29 @@
+"""bit feed index
+
+(course_id, created_at, id) serves the feed's "bits of these courses,
+newest first" keyset range scans.
+
+Revision ID: 0005_bit_feed_index
+Revises: 0004_user_embedding_model
+Create Date: 2026-10-19 14:50:47.201584
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_bit_feed_index'
+down_revision = '0004_user_embedding_model'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bit', schema=None) as batch_op:
+        batch_op.create_index('ix_bit_course_id_created_at_id', ['course_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bit', schema=None) as batch_op:
+        batch_op.drop_index('ix_bit_course_id_created_at_id')
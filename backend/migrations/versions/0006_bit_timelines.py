@@ -0,0 +1,39 @@
+"""bit timelines
+
+Per-user timeline rows for fan-out-on-write feeds. The table starts empty;
+`flask rebuild-timelines` fills it before BIT_TIMELINES is turned on.
+
+Revision ID: 0006_bit_timelines
+Revises: 0005_bit_feed_index
+Create Date: 2026-10-19 14:51:20.937412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_bit_timelines'
+down_revision = '0005_bit_feed_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('bit_timelines',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bit_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['bit_id'], ['bit.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'bit_id')
+    )
+    with op.batch_alter_table('bit_timelines', schema=None) as batch_op:
+        batch_op.create_index('ix_bit_timelines_user_id_created_at_bit_id', ['user_id', 'created_at', 'bit_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bit_timelines', schema=None) as batch_op:
+        batch_op.drop_index('ix_bit_timelines_user_id_created_at_bit_id')
+
+    op.drop_table('bit_timelines')
@@ -0,0 +1,45 @@
+"""bit likes
+
+- bit_likes: one row per user per liked bit
+- bit.like_count: denormalized count, flushed in batches by LikeCounter
+
+Revision ID: 0007_bit_likes
+Revises: 0006_bit_timelines
+Create Date: 2026-10-19 14:51:58.460139
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_bit_likes'
+down_revision = '0006_bit_timelines'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bit', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table('bit_likes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bit_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['bit_id'], ['bit.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'bit_id')
+    )
+    with op.batch_alter_table('bit_likes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bit_likes_bit_id'), ['bit_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bit_likes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bit_likes_bit_id'))
+
+    op.drop_table('bit_likes')
+
+    with op.batch_alter_table('bit', schema=None) as batch_op:
+        batch_op.drop_column('like_count')
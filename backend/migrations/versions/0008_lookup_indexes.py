@@ -0,0 +1,70 @@
+"""index hot lookup columns
+
+- course.number: unique, which also indexes filter_by(number=...) and
+  number IN (...) lookups
+- review.course_id: index
+- saved_courses: composite primary key (user_id, course_id), which serves
+  the per-user lookups, plus an index on course_id for the per-course ones
+
+bit.course_id and bit (course_id, created_at) are already served by
+ix_bit_course_id_created_at_id, and user.email by its unique constraint.
+
+Revision ID: 0008_lookup_indexes
+Revises: 0007_bit_likes
+Create Date: 2026-10-19 14:48:52.495428
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_lookup_indexes'
+down_revision = '0007_bit_likes'
+branch_labels = None
+depends_on = None
+
+
+def _has_unique_number():
+    inspector = sa.inspect(op.get_bind())
+    return any(c['column_names'] == ['number'] for c in inspector.get_unique_constraints('course'))
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Databases created with db.create_all() after Course.number became
+    # unique already have the constraint
+    if not _has_unique_number():
+        duplicates = bind.execute(sa.text(
+            "SELECT number FROM course GROUP BY number HAVING count(*) > 1 ORDER BY number"
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(f"Merge duplicate course numbers before upgrading: {', '.join(duplicates)}")
+        op.create_unique_constraint('course_number_key', 'course', ['number'])
+
+    op.create_index('ix_review_course_id', 'review', ['course_id'], unique=False)
+
+    # A primary key needs non-null, distinct rows: drop dangling and
+    # repeated saves (they only ever duplicated feed entries)
+    op.execute("DELETE FROM saved_courses WHERE user_id IS NULL OR course_id IS NULL")
+    op.execute("""
+        DELETE FROM saved_courses a USING saved_courses b
+        WHERE a.user_id = b.user_id AND a.course_id = b.course_id AND a.ctid > b.ctid
+    """)
+    op.alter_column('saved_courses', 'user_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('saved_courses', 'course_id', existing_type=sa.Integer(), nullable=False)
+    op.create_primary_key('saved_courses_pkey', 'saved_courses', ['user_id', 'course_id'])
+    op.create_index('ix_saved_courses_course_id', 'saved_courses', ['course_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_saved_courses_course_id', table_name='saved_courses')
+    op.drop_constraint('saved_courses_pkey', 'saved_courses', type_='primary')
+    op.alter_column('saved_courses', 'course_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('saved_courses', 'user_id', existing_type=sa.Integer(), nullable=True)
+
+    op.drop_index('ix_review_course_id', table_name='review')
+
+    if _has_unique_number():
+        op.drop_constraint('course_number_key', 'course', type_='unique')
@@ -0,0 +1,35 @@
+"""course embedding columns
+
+float32 content/experience embeddings and the model that produced them,
+so processes can load course vectors from the database instead of
+re-embedding the catalog. The optional pgvector table used for in-database
+ranking is created by `flask build-vector-index`, not by a migration.
+
+Revision ID: 0009_course_embeddings
+Revises: 0008_lookup_indexes
+Create Date: 2026-10-19 15:02:11.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_course_embeddings'
+down_revision = '0008_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_embedding', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('experience_embedding', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('embedding_model', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('course', schema=None) as batch_op:
+        batch_op.drop_column('embedding_model')
+        batch_op.drop_column('experience_embedding')
+        batch_op.drop_column('content_embedding')
@@ -2,3 +2,6 @@ from .user import User
 from .course import Course
 from .review import Review
 from .bit import Bit
+from .recommendation import Recommendation
+from .timeline import TimelineEntry
+from .like import BitLike
@@ -2,6 +2,9 @@ from ..db import db
 
 saved_courses = db.Table(
     'saved_courses',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('course_id', db.Integer, db.ForeignKey('course.id'))
+    # (user_id, course_id) is the key: one save per user per course, and
+    # "courses saved by a user" is a prefix scan of the primary key
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    # "users who saved a course" (bit fan-out) needs its own index
+    db.Column('course_id', db.Integer, db.ForeignKey('course.id'), primary_key=True, index=True)
 )
\ No newline at end of file
@@ -2,9 +2,16 @@ from ..db import db
 from datetime import datetime
 
 class Bit(db.Model):
+    # Serves the feed's "bits of these courses, newest first" range scans
+    __table_args__ = (
+        db.Index('ix_bit_course_id_created_at_id', 'course_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
     content = db.Column(db.Text)
     media = db.Column(db.String)
     content_type = db.Column(db.String)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Flushed in batches by routes/likes.py; add the buffered delta when reading
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
\ No newline at end of file
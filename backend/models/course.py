@@ -1,8 +1,9 @@
 from ..db import db
+from datetime import datetime
 
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    number = db.Column(db.String, nullable=False)
+    number = db.Column(db.String, nullable=False, unique=True)
     name = db.Column(db.String, nullable=False)
     professor = db.Column(db.String)
     quote = db.Column(db.Text)
@@ -18,4 +19,12 @@ class Course(db.Model):
     instruction = db.Column(db.Float)
 
     content_summary = db.Column(db.Text)
-    experience_summary = db.Column(db.Text)
\ No newline at end of file
+    experience_summary = db.Column(db.Text)
+
+    # float32 embeddings of the summaries, and the model that produced them
+    content_embedding = db.Column(db.LargeBinary)
+    experience_embedding = db.Column(db.LargeBinary)
+    embedding_model = db.Column(db.String)
+
+    # Row version: bumped on every write, feeds the catalog version
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,10 @@
+from ..db import db
+from datetime import datetime
+
+class BitLike(db.Model):
+    __tablename__ = 'bit_likes'
+
+    # One like per user per bit
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    bit_id = db.Column(db.Integer, db.ForeignKey('bit.id'), primary_key=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,18 @@
+from ..db import db
+from datetime import datetime
+
+class Recommendation(db.Model):
+    __tablename__ = 'recommendations'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    score = db.Column(db.Float)
+    model_version = db.Column(db.String, nullable=False)
+
+    # Inputs the row was computed from, used to detect staleness
+    profile_version = db.Column(db.Integer, nullable=False, default=0)
+    catalog_version = db.Column(db.String, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    course = db.relationship('Course')
@@ -3,7 +3,7 @@ from datetime import datetime
 
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'))
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), index=True)
     course_number = db.Column(db.String)
     course_name = db.Column(db.String)
     professor = db.Column(db.String)
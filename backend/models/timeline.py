@@ -0,0 +1,15 @@
+from ..db import db
+
+class TimelineEntry(db.Model):
+    __tablename__ = 'bit_timelines'
+    # Feed reads are one range scan over (user_id, created_at, bit_id)
+    __table_args__ = (
+        db.Index('ix_bit_timelines_user_id_created_at_bit_id', 'user_id', 'created_at', 'bit_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    bit_id = db.Column(db.Integer, db.ForeignKey('bit.id'), primary_key=True)
+    # Copied from the bit so the timeline can be ordered without a join
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    bit = db.relationship('Bit')
@@ -18,4 +18,11 @@ class User(db.Model):
     rewarding = db.Column(db.Float)
     instruction = db.Column(db.Float)
 
+    # float32 recommendation vector, nudged online by save/like events
+    embedding = db.Column(db.LargeBinary)
+    # Embedding model the vector lives in; vectors from another model are discarded
+    embedding_model = db.Column(db.String)
+    # Bumped whenever anything feeding recommendations changes
+    profile_version = db.Column(db.Integer, nullable=False, default=0)
+
     saved_courses = db.relationship('Course', secondary=saved_courses, backref='saved_by_users')
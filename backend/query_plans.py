@@ -0,0 +1,105 @@
+import json
+import sys
+from datetime import datetime
+import click
+from sqlalchemy import select
+from .db import db
+from .models.course import Course
+from .models.review import Review
+from .models.user import User
+from .models.associations import saved_courses
+from .routes.bits import feed_query
+
+
+##########################################################################
+# These are the lookups behind the hot endpoints, each paired with the   #
+# index it should be served by. `flask check-query-plans` EXPLAINs every #
+# one and fails if the plan doesn't touch the expected index, so a       #
+# missing migration or a query rewrite that defeats an index shows up.   #
+##########################################################################
+
+def hot_queries():
+    """(name, statement, expected index) for each hot lookup."""
+    return [
+        ("course by number (/api/courses/by_number)",
+         select(Course).where(Course.number == "COMP_SCI 211"),
+         "course_number_key"),
+        ("courses by number list (similar courses)",
+         select(Course).where(Course.number.in_(["COMP_SCI 211", "COMP_SCI 213"])),
+         "course_number_key"),
+        ("user by email (/api/users/create)",
+         select(User).where(User.email == "someone@example.com"),
+         "user_email_key"),
+        ("reviews of a course",
+         select(Review).where(Review.course_id == 1),
+         "ix_review_course_id"),
+        ("saved courses of a user (/api/users/<id>/saved_courses)",
+         select(Course).join(saved_courses, saved_courses.c.course_id == Course.id)
+         .where(saved_courses.c.user_id == 1),
+         "saved_courses_pkey"),
+        ("users who saved a course (timeline fan-out)",
+         select(saved_courses.c.user_id).where(saved_courses.c.course_id == 1),
+         "ix_saved_courses_course_id"),
+        ("bits feed page (/api/bits/get_bits)",
+         feed_query(1, after=(datetime.utcnow(), 1 << 30)).limit(21).statement,
+         "ix_bit_course_id_created_at_id"),
+    ]
+
+
+def _indexes(plan):
+    """Every index named anywhere in a JSON plan tree."""
+    found = set()
+    if "Index Name" in plan:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found |= _indexes(child)
+    return found
+
+
+def explain(statement, force_index=True):
+    """
+    EXPLAIN a statement and return (indexes used, plan text).
+
+    Args:
+        force_index (bool): Discourage sequential scans, so the check also
+                            holds on small development databases where the
+                            planner would rightly scan the whole table
+    """
+    connection = db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    try:
+        if force_index:
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+        text = "\n".join(row[0] for row in
+                         connection.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params))
+    finally:
+        db.session.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _indexes(plan[0]["Plan"]), text
+
+
+def check(force_index=True, verbose=False):
+    """Print one line per hot query; return True if all of them use their index."""
+    ok = True
+    for name, statement, expected in hot_queries():
+        used, text = explain(statement, force_index=force_index)
+        passed = expected in used
+        ok = ok and passed
+        click.echo(f"{'✅' if passed else '❌'} {name}: expected {expected}, "
+                   f"used {', '.join(sorted(used)) or 'no index'}")
+        if verbose or not passed:
+            click.echo("    " + text.replace("\n", "\n    "))
+    return ok
+
+
+def register_commands(app):
+    @app.cli.command("check-query-plans")
+    @click.option("--natural", is_flag=True,
+                  help="Leave sequential scans enabled (meaningful on production-sized data)")
+    @click.option("--verbose", is_flag=True, help="Print every plan")
+    def check_query_plans(natural, verbose):
+        """Confirm the hot endpoint queries are served by their indexes."""
+        if not check(force_index=not natural, verbose=verbose):
+            sys.exit(1)
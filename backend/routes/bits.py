@@ -1,20 +1,82 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from ..models.course import Course
 from ..models.bit import Bit
 from ..models.user import User
+from ..models.associations import saved_courses
+from ..models.like import BitLike
 from ..app import db
+from .user_vectors import apply_event
+from . import timelines
+from .likes import like_counter, record_like
+from .response_cache import FEED_TTL, cached, response_cache
 
 bits_bp = Blueprint('bits', __name__, url_prefix='/api/bits')
 
+# Configurations
+FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 100
+
+
+def encode_cursor(bit):
+    return f"{bit.created_at.isoformat()},{bit.id}"
+
+
+def decode_cursor(cursor):
+    """Parse an `after` cursor ("<created_at>,<id>") into a (datetime, int) pair."""
+    created_at, bit_id = cursor.rsplit(',', 1)
+    return datetime.fromisoformat(created_at), int(bit_id)
+
+
+def feed_query(user_id, after=None):
+    # Newest first across all saved courses
+    query = (Bit.query
+             .filter(Bit.course_id.in_(
+                 db.session.query(saved_courses.c.course_id)
+                 .filter(saved_courses.c.user_id == user_id)))
+             .order_by(Bit.created_at.desc(), Bit.id.desc()))
+
+    if after is not None:
+        # Keyset pagination: resume strictly after the last bit served
+        query = query.filter(tuple_(Bit.created_at, Bit.id) < after)
+    return query
+
+
+def _query_feed(user_id, after, limit):
+    # One extra row tells us whether there is a next page
+    return feed_query(user_id, after).limit(limit + 1).all()
+
+
+# Like counts here are eventually consistent: the page may be served from
+# the response cache for up to FEED_TTL seconds, and likes buffered by
+# other processes land within LIKE_FLUSH_INTERVAL_MS. /<bit_id>/likes is
+# never cached.
 @bits_bp.route('/get_bits/<int:user_id>', methods=['GET'])
+@cached(FEED_TTL, lambda user_id: ["bits", f"user:{user_id}:saved"])
 def get_bits_by_user(user_id):
-    user = User.query.get_or_404(user_id)
-
-    bits = []
-    courses = user.saved_courses
-    for course in courses:
-        result = get_bits_for_course(course.id)
-        bits.append(result)
+    limit = min(max(request.args.get('limit', FEED_PAGE_SIZE, type=int), 1), MAX_FEED_PAGE_SIZE)
+    after = request.args.get('after')
+
+    after_key = None
+    if after:
+        try:
+            after_key = decode_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+    else:
+        User.query.get_or_404(user_id)
+
+    if timelines.enabled():
+        # Precomputed on write: a single range scan over the user's timeline
+        bits = timelines.read(user_id, after=after_key, limit=limit)
+    else:
+        bits = _query_feed(user_id, after_key, limit)
+
+    has_more = len(bits) > limit
+    bits = bits[:limit]
 
     result = []
     for bit in bits:
@@ -24,23 +86,71 @@ def get_bits_by_user(user_id):
             "content": bit.content,
             "media": bit.media,
             "content_type": bit.content_type,
-            "created_at": bit.created_at.isoformat()
+            "created_at": bit.created_at.isoformat(),
+            "likes": like_counter.count(bit)
         })
 
-    return jsonify(result)
+    # The body stays a plain list; the cursor for the next page rides in a header
+    response = jsonify(result)
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_cursor(bits[-1])
+    return response
 
-@bits_bp.route('/like/<int:user_id>/<int:bit_id>', methods=['GET'])
+@bits_bp.route('/like/<int:user_id>/<int:bit_id>', methods=['GET', 'POST'])
 def like_bits(user_id, bit_id):
-    user = User.query.get_or_404(user_id)
-    bit = Bit.query.get_or_404(bit_id)
+    # Insert-if-absent; the (user_id, bit_id) key makes repeat taps no-ops
+    stmt = (insert(BitLike.__table__)
+            .values(user_id=user_id, bit_id=bit_id)
+            .on_conflict_do_nothing()
+            .returning(BitLike.__table__.c.bit_id))
+    try:
+        liked = db.session.execute(stmt).first() is not None
+    except IntegrityError:
+        # Foreign key violation: no such user or bit
+        db.session.rollback()
+        return jsonify({"error": "User or bit not found"}), 404
+
+    if liked:
+        # Liking a bit pulls the user's vector toward the bit's course
+        bit = db.session.get(Bit, bit_id)
+        course = db.session.get(Course, bit.course_id) if bit.course_id else None
+        if course is not None:
+            apply_event(db.session.get(User, user_id), course, "like")
+        db.session.commit()
+        response_cache.invalidate(f"user:{user_id}:recommendations")
+        record_like(bit_id, 1)
 
     return jsonify({
-        "message": f"User {user.username} liked Bit {bit.id}",
-        "bit_id": bit.id,
-        "user_id": user.id
+        "message": f"User {user_id} liked Bit {bit_id}" if liked else f"User {user_id} already liked Bit {bit_id}",
+        "bit_id": bit_id,
+        "user_id": user_id,
+        "liked": liked
     })
 
 
+@bits_bp.route('/unlike/<int:user_id>/<int:bit_id>', methods=['POST'])
+def unlike_bits(user_id, bit_id):
+    removed = BitLike.query.filter_by(user_id=user_id, bit_id=bit_id).delete(synchronize_session=False)
+    db.session.commit()
+    if removed:
+        record_like(bit_id, -1)
+
+    return jsonify({
+        "message": f"User {user_id} unliked Bit {bit_id}" if removed else f"User {user_id} had not liked Bit {bit_id}",
+        "bit_id": bit_id,
+        "user_id": user_id,
+        "unliked": bool(removed)
+    })
+
+
+# Stored count plus this process's buffered likes; other processes' likes
+# are included once flushed (LIKE_FLUSH_INTERVAL_MS)
+@bits_bp.route('/<int:bit_id>/likes', methods=['GET'])
+def get_bit_likes(bit_id):
+    bit = Bit.query.get_or_404(bit_id)
+    return jsonify({"bit_id": bit.id, "likes": like_counter.count(bit)})
+
+
 @bits_bp.route('/add', methods=['POST'])
 def add_bits():
     data = request.get_json()
@@ -62,17 +172,15 @@ def add_bits():
     db.session.add(bit)
     msg = "Bit created."
 
+    if timelines.enabled():
+        # Fan out on write to everyone who saved the course
+        db.session.flush()
+        timelines.fan_out(bit)
+
     db.session.commit()
+    response_cache.invalidate("bits")
 
     return jsonify({
         "message": msg,
         "bit_id": bit.id
     })
-
-
-def get_bits_for_course(course_id):
-    course = Course.query.get_or_404(course_id)
-
-    bits = Bit.query.filter_by(course_id=course.id).all()
-
-    return bits
\ No newline at end of file
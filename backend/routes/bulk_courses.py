@@ -0,0 +1,221 @@
+import glob
+import json
+import os
+from datetime import datetime
+import click
+from sqlalchemy import case, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from ..db import db
+from ..models.course import Course
+from .serializers import RADAR_FIELDS, course_json
+from .course_embeddings import parse_embeddings, sync_vector_index
+from .response_cache import response_cache
+from .rec_worker import recommendation_worker
+
+
+# Configurations
+CHUNK_SIZE = 500  # rows per INSERT ... ON CONFLICT statement
+
+TEXT_FIELDS = ("name", "professor", "quote", "description", "content_summary", "experience_summary")
+LIST_FIELDS = ("requirements", "prerequisites")
+VECTOR_FIELDS = ("content_embedding", "experience_embedding", "embedding_model")
+
+
+def normalize_course(record):
+    """
+    Map an add-update payload or a final_reports record onto Course columns.
+
+    Accepts number/course_number, name/course_name, slogan as the quote and
+    radar values either under "radar" or at the top level. Empty strings
+    and lists become None so an update keeps the stored value, matching
+    /api/courses/add-update. Embeddings are optional, as in add-update.
+
+    Raises:
+        ValueError: If the record can't be stored
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Course must be a JSON object")
+
+    number = record.get("number") or record.get("course_number")
+    if not number or not isinstance(number, str):
+        raise ValueError("Course number is required.")
+
+    row = {
+        "number": number.strip(),
+        "name": record.get("name") or record.get("course_name"),
+        "professor": record.get("professor"),
+        "quote": record.get("slogan") or record.get("quote"),
+        "description": record.get("description"),
+        "content_summary": record.get("content_summary"),
+        "experience_summary": record.get("experience_summary"),
+    }
+    for field in TEXT_FIELDS:
+        if row[field] is not None and not isinstance(row[field], str):
+            raise ValueError(f"{field} must be a string")
+        row[field] = row[field] or None
+
+    for field in LIST_FIELDS:
+        values = record.get(field) or []
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"{field} must be a list of strings")
+        row[field] = values
+
+    radar = record.get("radar") if isinstance(record.get("radar"), dict) else record
+    for field in RADAR_FIELDS:
+        try:
+            row[field] = float(radar.get(field) or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"radar.{field} must be a number")
+
+    # Every row needs the same keys for a multi-row INSERT
+    row.update(dict.fromkeys(VECTOR_FIELDS), **parse_embeddings(record))
+    return row
+
+
+##########################################################################
+# This function upserts many courses with set-based statements. Rows are #
+# validated up front, de-duplicated by number (last one wins) and sent   #
+# in chunks of INSERT ... ON CONFLICT (number) DO UPDATE, all inside one #
+# transaction; RETURNING tells created rows from updated ones.           #
+##########################################################################
+
+def bulk_upsert(records, chunk_size=CHUNK_SIZE):
+    """
+    Upsert courses and report what happened to each input row.
+
+    Args:
+        records (iterable): Course dicts, or (row, error) pairs for input
+                            that already failed to parse
+        chunk_size (int): Rows per statement
+
+    Returns:
+        list: One result per input row: row, number, status (created,
+              updated, duplicate or error), course_id and error
+    """
+    results = []
+    latest = {}
+    for position, record in enumerate(records):
+        if isinstance(record, tuple):
+            results.append({"row": position, "number": None, "status": "error", "error": record[1]})
+            continue
+        try:
+            row = normalize_course(record)
+        except ValueError as e:
+            number = (record.get("number") or record.get("course_number")) if isinstance(record, dict) else None
+            results.append({"row": position, "number": number, "status": "error", "error": str(e)})
+            continue
+        result = {"row": position, "number": row["number"], "status": None}
+        results.append(result)
+        if row["number"] in latest:
+            previous = latest[row["number"]][1]
+            previous.update(status="duplicate", error=f"Superseded by row {position}")
+        latest[row["number"]] = (row, result)
+
+    pending = list(latest.values())
+
+    # New courses need a name; existing ones keep theirs. Postgres checks
+    # NOT NULL before resolving the conflict, so pass the stored name along.
+    nameless = [number for number, (row, _) in latest.items() if row["name"] is None]
+    if nameless:
+        existing = dict(db.session.query(Course.number, Course.name).filter(Course.number.in_(nameless)).all())
+        for row, result in list(pending):
+            if row["name"] is not None:
+                continue
+            if row["number"] in existing:
+                row["name"] = existing[row["number"]]
+            else:
+                result.update(status="error", error="Course name is required for new courses.")
+                pending.remove((row, result))
+
+    table = Course.__table__
+    now = datetime.utcnow()
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        stmt = insert(table).values([dict(row, updated_at=now) for row, _ in chunk])
+        excluded = stmt.excluded
+
+        # Same rules as add-update: missing fields keep the stored value,
+        # radar values are always replaced
+        updates = {field: func.coalesce(excluded[field], table.c[field]) for field in TEXT_FIELDS + VECTOR_FIELDS}
+        updates.update({field: case((func.cardinality(excluded[field]) > 0, excluded[field]),
+                                    else_=table.c[field]) for field in LIST_FIELDS})
+        updates.update({field: excluded[field] for field in RADAR_FIELDS})
+        updates["updated_at"] = excluded.updated_at
+
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.number], set_=updates)
+        # xmax is 0 only for rows this statement inserted
+        stmt = stmt.returning(table.c.id, table.c.number, (literal_column("xmax") == 0).label("inserted"))
+
+        by_number = {row["number"]: result for row, result in chunk}
+        for course_id, number, inserted in db.session.execute(stmt):
+            by_number[number].update(status="created" if inserted else "updated", course_id=course_id)
+
+    return results
+
+
+def apply_bulk_upsert(records, chunk_size=CHUNK_SIZE):
+    """Run bulk_upsert in one transaction and refresh the caches that depend on the catalog."""
+    try:
+        results = bulk_upsert(records, chunk_size=chunk_size)
+        sync_vector_index([r["course_id"] for r in results if r["status"] in ("created", "updated")])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if any(r["status"] in ("created", "updated") for r in results):
+        course_json.invalidate()
+        response_cache.invalidate("courses")
+        recommendation_worker.catalog_changed()
+    return results
+
+
+def summarize(results):
+    counts = {"created": 0, "updated": 0, "duplicate": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
+
+
+def parse_ndjson(lines):
+    """Yield one course per non-empty line, or a (line, error) pair for lines that aren't JSON."""
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield (number, f"Line {number}: {e.msg}")
+
+
+def read_course_files(paths):
+    """Courses from .json files (an object or an array), .ndjson files and directories of .json files."""
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, "r", encoding="utf-8") as f:
+                if file_path.endswith((".ndjson", ".jsonl")):
+                    yield from parse_ndjson(f)
+                    continue
+                data = json.load(f)
+            if isinstance(data, list):
+                yield from data
+            else:
+                yield data
+
+
+def register_commands(app):
+    @app.cli.command("import-courses")
+    @click.argument("paths", nargs=-1, required=True)
+    @click.option("--chunk-size", type=int, default=CHUNK_SIZE)
+    @click.option("--verbose", is_flag=True, help="Print every row's outcome")
+    def import_courses(paths, chunk_size, verbose):
+        """Bulk upsert courses, e.g. `flask import-courses data/final_reports`."""
+        results = apply_bulk_upsert(read_course_files(paths), chunk_size=chunk_size)
+        for result in results:
+            if verbose or result["status"] == "error":
+                click.echo(json.dumps(result))
+        counts = summarize(results)
+        click.echo(f"✅ {counts['created']} created, {counts['updated']} updated, "
+                   f"{counts['duplicate']} duplicates, {counts['error']} errors")
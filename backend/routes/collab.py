@@ -0,0 +1,170 @@
+import math
+import threading
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import select
+from ..db import db
+from ..models.associations import saved_courses
+
+
+# Configurations
+TOP_K = 20
+
+
+#########################################################################
+# This defines an item-item collaborative filtering model built from    #
+# the saved_courses association table. Co-occurrence counts are kept so #
+# single saves/unsaves can be applied without a rebuild, and each       #
+# course keeps its top-k cosine neighbours in a CSR similarity matrix.  #
+#########################################################################
+
+class ItemItemModel:
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.lock = threading.RLock()
+        self.built = False
+        self.positions = {}
+        self.course_ids = []
+        self.user_items = {}
+        self.item_counts = []
+        self.cooccurrence = []
+        self.neighbours = []
+        self._similarity = None
+
+    def build(self):
+        """Rebuild the model from every (user_id, course_id) row in saved_courses."""
+        rows = db.session.execute(select(saved_courses.c.user_id, saved_courses.c.course_id)).all()
+
+        with self.lock:
+            self.positions = {}
+            self.course_ids = []
+            self.item_counts = []
+            self.cooccurrence = []
+            self.neighbours = []
+            self.user_items = {}
+            for user_id, course_id in rows:
+                if user_id is None or course_id is None:
+                    continue
+                self.user_items.setdefault(user_id, set()).add(self._position(course_id))
+
+            # Users x items interaction matrix; X^T X gives co-occurrence counts
+            user_rows, item_cols = [], []
+            for row, items in enumerate(self.user_items.values()):
+                user_rows.extend([row] * len(items))
+                item_cols.extend(items)
+            interactions = csr_matrix(
+                (np.ones(len(item_cols), dtype=np.float32), (user_rows, item_cols)),
+                shape=(len(self.user_items), len(self.course_ids))
+            )
+            counts = (interactions.T @ interactions).tocsr()
+
+            self.item_counts = [int(c) for c in counts.diagonal()]
+            self.cooccurrence = []
+            for i in range(len(self.course_ids)):
+                start, end = counts.indptr[i], counts.indptr[i + 1]
+                row = dict(zip(counts.indices[start:end].tolist(), counts.data[start:end].astype(int).tolist()))
+                row.pop(i, None)
+                self.cooccurrence.append(row)
+
+            self.neighbours = [self._top_neighbours(i) for i in range(len(self.course_ids))]
+            self._similarity = None
+            self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _position(self, course_id):
+        position = self.positions.get(course_id)
+        if position is None:
+            position = len(self.course_ids)
+            self.positions[course_id] = position
+            self.course_ids.append(course_id)
+            self.item_counts.append(0)
+            self.cooccurrence.append({})
+            self.neighbours.append([])
+            self._similarity = None
+        return position
+
+    def _top_neighbours(self, i):
+        """Return the top-k (position, cosine) neighbours of item i."""
+        scored = [
+            (j, count / math.sqrt(self.item_counts[i] * self.item_counts[j]))
+            for j, count in self.cooccurrence[i].items()
+            if count > 0 and self.item_counts[i] and self.item_counts[j]
+        ]
+        return sorted(scored, key=lambda x: x[1], reverse=True)[:self.top_k]
+
+    def _update(self, user_id, course_id, delta):
+        with self.lock:
+            if not self.built:
+                return
+            items = self.user_items.setdefault(user_id, set())
+            i = self._position(course_id)
+            if (delta > 0) == (i in items):
+                return
+
+            if delta < 0:
+                items.discard(i)
+            for j in items:
+                self.cooccurrence[i][j] = self.cooccurrence[i].get(j, 0) + delta
+                self.cooccurrence[j][i] = self.cooccurrence[j].get(i, 0) + delta
+            if delta > 0:
+                items.add(i)
+            self.item_counts[i] += delta
+
+            # i's count changed, so every item co-occurring with it needs its list refreshed
+            for k in [i] + list(self.cooccurrence[i]):
+                self.neighbours[k] = self._top_neighbours(k)
+            self._similarity = None
+
+    def record_save(self, user_id, course_id):
+        self._update(user_id, course_id, 1)
+
+    def record_unsave(self, user_id, course_id):
+        self._update(user_id, course_id, -1)
+
+    def similarity_matrix(self):
+        """Items x items CSR matrix holding only each item's top-k neighbours."""
+        with self.lock:
+            if self._similarity is None:
+                rows, cols, data = [], [], []
+                for i, neighbours in enumerate(self.neighbours):
+                    for j, score in neighbours:
+                        rows.append(i)
+                        cols.append(j)
+                        data.append(score)
+                size = len(self.course_ids)
+                self._similarity = csr_matrix((np.array(data, dtype=np.float32), (rows, cols)), shape=(size, size))
+            return self._similarity
+
+    def recommend(self, user_id, top_n=10):
+        """
+        Score unseen courses for a user from their saved courses.
+
+        Args:
+            user_id (int): User to score
+            top_n (int): Number of courses to return
+
+        Returns:
+            list: (course_id, score) pairs ordered best first
+        """
+        with self.lock:
+            items = sorted(self.user_items.get(user_id, ()))
+            if not items:
+                return []
+            similarity = self.similarity_matrix()
+            user_vector = csr_matrix(
+                (np.ones(len(items), dtype=np.float32), ([0] * len(items), items)),
+                shape=(1, len(self.course_ids))
+            )
+            scores = (user_vector @ similarity).tocoo()
+            ranked = [
+                (self.course_ids[j], float(score))
+                for j, score in zip(scores.col, scores.data)
+                if j not in self.user_items[user_id]
+            ]
+        return sorted(ranked, key=lambda x: x[1], reverse=True)[:top_n]
+
+
+item_model = ItemItemModel()
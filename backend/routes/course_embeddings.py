@@ -0,0 +1,232 @@
+import heapq
+import json
+import click
+import numpy as np
+from flask import current_app
+from sqlalchemy import bindparam, select, text, update
+from ..db import db
+from ..models.course import Course
+from .rec_sys import CONTENT_WEIGHT, EXPERIENCE_WEIGHT, EMBEDDING_MODEL
+
+
+# Configurations
+SCAN_BATCH = 1000  # rows decoded per step of the NumPy scan
+VECTOR_INDEX_TABLE = "course_vector_index"  # pgvector copy of the blobs, built by `flask build-vector-index`
+
+
+def encode(vector):
+    """float32 bytes for a Course embedding column."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode(blob):
+    return None if blob is None else np.frombuffer(blob, dtype=np.float32)
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def _literal(vector):
+    """pgvector text input, so no client-side adapter is needed."""
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+
+def parse_embeddings(record):
+    """
+    Validate the optional embedding fields of an ingest payload.
+
+    Returns:
+        dict: content_embedding / experience_embedding as float32 bytes and
+              embedding_model, or {} when the record carries no embeddings
+
+    Raises:
+        ValueError: If only one embedding is given or they don't match
+    """
+    content, experience = record.get("content_embedding"), record.get("experience_embedding")
+    if content is None and experience is None:
+        return {}
+    if content is None or experience is None:
+        raise ValueError("content_embedding and experience_embedding must be sent together")
+    try:
+        content = np.asarray(content, dtype=np.float32)
+        experience = np.asarray(experience, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise ValueError("Embeddings must be lists of numbers")
+    if content.ndim != 1 or content.shape != experience.shape or not content.size:
+        raise ValueError("Embeddings must be non-empty lists of the same length")
+    if not content.any() or not experience.any():
+        # Cosine similarity is undefined for a zero vector
+        raise ValueError("Embeddings can't be all zeros")
+    return {
+        "content_embedding": content.tobytes(),
+        "experience_embedding": experience.tobytes(),
+        "embedding_model": record.get("embedding_model") or EMBEDDING_MODEL,
+    }
+
+
+def stored_embeddings(course, model=EMBEDDING_MODEL):
+    """(content, experience) vectors stored on a course, or None if missing or from another model."""
+    if course.content_embedding is None or course.experience_embedding is None or course.embedding_model != model:
+        return None
+    return decode(course.content_embedding), decode(course.experience_embedding)
+
+
+##########################################################################
+# These functions search course embeddings inside the database. With the #
+# pgvector index table present the ranking runs in Postgres; otherwise   #
+# the float32 blobs are streamed SCAN_BATCH rows at a time and scored    #
+# with NumPy, keeping only a running top-n so memory stays flat.         #
+##########################################################################
+
+def vector_index_available():
+    if current_app.config.get("VECTOR_SEARCH") == "numpy":
+        return False
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.execute(text("SELECT to_regclass(:name)"), {"name": VECTOR_INDEX_TABLE}).scalar() is not None
+
+
+def _search_pgvector(query, top_n, content_weight, experience_weight, model, exclude_ids):
+    # <=> is cosine distance
+    stmt = text(f"""
+        SELECT course_id,
+               :cw * (1 - (content <=> CAST(:q AS vector))) +
+               :ew * (1 - (experience <=> CAST(:q AS vector))) AS score
+        FROM {VECTOR_INDEX_TABLE}
+        WHERE embedding_model = :model AND vector_dims(content) = :dims AND NOT (course_id = ANY(:exclude))
+        ORDER BY score DESC
+        LIMIT :n
+    """)
+    rows = db.session.execute(stmt, {"q": _literal(query), "cw": content_weight, "ew": experience_weight,
+                                     "model": model, "dims": len(query), "exclude": list(exclude_ids),
+                                     "n": top_n})
+    return [(course_id, float(score)) for course_id, score in rows]
+
+
+def _search_numpy(query, top_n, content_weight, experience_weight, model, exclude_ids):
+    query = np.asarray(query, dtype=np.float32)
+    if query.ndim != 1:
+        raise ValueError("query must be a flat vector")
+    query = _unit(query)
+    stmt = (select(Course.id, Course.content_embedding, Course.experience_embedding)
+            .where(Course.embedding_model == model,
+                   Course.content_embedding.isnot(None),
+                   Course.experience_embedding.isnot(None))
+            .execution_options(yield_per=SCAN_BATCH))
+    if exclude_ids:
+        stmt = stmt.where(Course.id.notin_(list(exclude_ids)))
+
+    best = []
+    size = 4 * len(query)  # float32 bytes
+    for rows in db.session.execute(stmt).partitions():
+        # Rows stored at another dimension can't be stacked with (or scored against) the query
+        rows = [row for row in rows if len(row[1]) == size and len(row[2]) == size]
+        if not rows:
+            continue
+        ids = np.array([row[0] for row in rows])
+        content = _unit(np.vstack([decode(row[1]) for row in rows]))
+        experience = _unit(np.vstack([decode(row[2]) for row in rows]))
+        scores = content_weight * (content @ query) + experience_weight * (experience @ query)
+        top = np.argpartition(-scores, min(top_n, len(scores)) - 1)[:top_n]
+        best = heapq.nlargest(top_n, best + [(float(scores[i]), int(ids[i])) for i in top])
+    return [(course_id, score) for score, course_id in best]
+
+
+def search(query, top_n=10, content_weight=CONTENT_WEIGHT, experience_weight=EXPERIENCE_WEIGHT,
+           model=EMBEDDING_MODEL, exclude_ids=()):
+    """
+    Courses whose stored embeddings best match a query vector.
+
+    Scores are content_weight * cos(query, content) + experience_weight *
+    cos(query, experience), as in CourseRecommender.recommend.
+
+    Args:
+        query (array-like): Query vector in `model`'s space
+        top_n (int): Number of results
+        model (str): Only courses embedded with this model are searched
+        exclude_ids (iterable): Course ids to leave out
+
+    Returns:
+        list: (course_id, score) pairs, best first
+    """
+    if vector_index_available():
+        return _search_pgvector(query, top_n, content_weight, experience_weight, model, exclude_ids)
+    return _search_numpy(query, top_n, content_weight, experience_weight, model, exclude_ids)
+
+
+def sync_vector_index(course_ids=None):
+    """Copy course blobs into the pgvector table (all courses, or just `course_ids`), if it exists."""
+    if not vector_index_available():
+        return 0
+    query = Course.query.filter(Course.content_embedding.isnot(None), Course.experience_embedding.isnot(None))
+    if course_ids is not None:
+        db.session.execute(text(f"DELETE FROM {VECTOR_INDEX_TABLE} WHERE course_id = ANY(:ids)"),
+                           {"ids": list(course_ids)})
+        query = query.filter(Course.id.in_(list(course_ids)))
+    else:
+        db.session.execute(text(f"TRUNCATE {VECTOR_INDEX_TABLE}"))
+
+    rows = [{"id": c.id, "model": c.embedding_model, "content": _literal(decode(c.content_embedding)),
+             "experience": _literal(decode(c.experience_embedding))} for c in query.yield_per(SCAN_BATCH)]
+    if rows:
+        db.session.execute(text(f"""
+            INSERT INTO {VECTOR_INDEX_TABLE} (course_id, embedding_model, content, experience)
+            VALUES (:id, :model, CAST(:content AS vector), CAST(:experience AS vector))
+        """), rows)
+    return len(rows)
+
+
+def import_snapshot(path):
+    """
+    Store the embeddings from a recommender snapshot (rec_sys/app.py) on
+    the matching Course rows, in one batched UPDATE.
+
+    Returns:
+        int: Snapshot rows; those without a matching course are skipped
+    """
+    with np.load(path) as snapshot:
+        courses = json.loads(str(snapshot["courses"]))
+        content = snapshot["content_embeddings"].astype(np.float32)
+        experience = snapshot["experience_embeddings"].astype(np.float32)
+        model = str(snapshot["embedding_model"]) if "embedding_model" in snapshot else EMBEDDING_MODEL
+
+    params = [{"b_number": course.get("number") or course.get("course_number"),
+               "content": content[row].tobytes(), "experience": experience[row].tobytes()}
+              for row, course in enumerate(courses)]
+    table = Course.__table__
+    stmt = (update(table)
+            .where(table.c.number == bindparam("b_number"))
+            .values(content_embedding=bindparam("content"), experience_embedding=bindparam("experience"),
+                    embedding_model=model))
+    db.session.execute(stmt, params)
+    return len(params)
+
+
+def register_commands(app):
+    @app.cli.command("import-course-embeddings")
+    @click.argument("snapshot", required=False)
+    def import_course_embeddings(snapshot):
+        """Store recommender snapshot embeddings on Course rows (default: REC_SNAPSHOT_PATH)."""
+        count = import_snapshot(snapshot or app.config["REC_SNAPSHOT_PATH"])
+        sync_vector_index()
+        db.session.commit()
+        click.echo(f"✅ Stored embeddings from {count} snapshot rows")
+
+    @app.cli.command("build-vector-index")
+    def build_vector_index():
+        """Create (or refill) the pgvector table that search() ranks in Postgres."""
+        db.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        db.session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {VECTOR_INDEX_TABLE} (
+                course_id integer PRIMARY KEY REFERENCES course (id) ON DELETE CASCADE,
+                embedding_model varchar NOT NULL,
+                content vector NOT NULL,
+                experience vector NOT NULL
+            )
+        """))
+        count = sync_vector_index()
+        db.session.commit()
+        click.echo(f"✅ Indexed {count} course vectors")
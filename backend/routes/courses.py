@@ -1,55 +1,55 @@
-from flask import Blueprint, request, jsonify
+import math
+from flask import Blueprint, request, jsonify, current_app
 from ..models.course import Course
 from ..db import db
+from .neighbours import neighbour_store
+from .rec_worker import recommendation_worker
+from .serializers import course_json, json_response
+from .bulk_courses import apply_bulk_upsert, parse_ndjson, summarize
+from . import course_embeddings
+from .response_cache import COURSE_TTL, cached, response_cache
 
 courses_bp = Blueprint('courses', __name__, url_prefix='/api/courses')
 
 @courses_bp.route('/by_number/<string:course_number>', methods=['GET'])
+@cached(COURSE_TTL, lambda **_: ["courses"])
 def get_course_by_number(course_number):
     course = Course.query.filter_by(number=course_number).first()
     if not course:
         return jsonify({"error": "Course not found."}), 404
 
-    return jsonify({
-        "id": course.id,
-        "number": course.number,
-        "name": course.name,
-        "professor": course.professor,
-        "quote": course.quote,
-        "requirements": course.requirements,
-        "prerequisites": course.prerequisites,
-        "description": course.description,
-        "radar": {
-            "liked": course.liked,
-            "difficulty": course.difficulty,
-            "practicality": course.practicality,
-            "collaborative": course.collaborative,
-            "rewarding": course.rewarding,
-            "instruction": course.instruction,
-        }
-    })
+    return json_response(course_json.get(course, "detail"))
+
+@courses_bp.route('/by_number/<string:course_number>/similar', methods=['GET'])
+def get_similar_courses(course_number):
+    limit = request.args.get('limit', type=int)
+
+    neighbours = neighbour_store.lookup(current_app.config['NEIGHBOURS_PATH'], course_number, limit=limit)
+    if neighbours is None:
+        return jsonify({"error": "No similar courses available for this course."}), 404
+
+    courses = {c.number: c for c in Course.query.filter(Course.number.in_([n for n, _ in neighbours])).all()}
+
+    result = []
+    for number, score in neighbours:
+        course = courses.get(number)
+        if course is None:
+            continue
+        result.append({
+            "id": course.id,
+            "number": course.number,
+            "name": course.name,
+            "professor": course.professor,
+            "score": score,
+        })
+
+    return jsonify({"number": course_number, "similar": result})
 
 @courses_bp.route('/by_id/<int:course_id>', methods=['GET'])
+@cached(COURSE_TTL, lambda **_: ["courses"])
 def get_course_by_id(course_id):
     course = Course.query.get_or_404(course_id)
-    return jsonify({
-        'id': course.id,
-        'number': course.number,
-        'name': course.name,
-        'professor': course.professor,
-        'quote': course.quote,
-        'requirements': course.requirements,
-        'prerequisites': course.prerequisites,
-        'description': course.description,
-        'radar': {
-            'liked': course.liked,
-            'difficulty': course.difficulty,
-            'practicality': course.practicality,
-            'collaborative': course.collaborative,
-            'rewarding': course.rewarding,
-            'instruction': course.instruction,
-        }
-    })
+    return json_response(course_json.get(course, "detail"))
 
 
 @courses_bp.route('/add-update', methods=['POST'])
@@ -79,6 +79,12 @@ def add_or_update_course():
     content_summary = data.get('content_summary')
     experience_summary = data.get('experience_summary')
 
+    # Optional float32 embeddings from the ingest pipeline
+    try:
+        embeddings = course_embeddings.parse_embeddings(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     course = Course.query.filter_by(number=number).first()
 
     if course:
@@ -118,5 +124,92 @@ def add_or_update_course():
         db.session.add(course)
         msg = "Course created."
 
+    for field, value in embeddings.items():
+        setattr(course, field, value)
+    if embeddings:
+        db.session.flush()
+        course_embeddings.sync_vector_index([course.id])
+
     db.session.commit()
+    course_json.invalidate(course.id)
+    response_cache.invalidate("courses")
+    recommendation_worker.catalog_changed()
     return jsonify({"message": msg, "course_id": course.id})
+
+
+@courses_bp.route('/bulk-upsert', methods=['POST'])
+def bulk_upsert_courses():
+    """
+    Upsert many courses at once.
+
+    Takes a JSON array (or {"courses": [...]}) of add-update payloads or
+    final_reports records, or an application/x-ndjson stream with one
+    course per line. Invalid rows are reported and skipped; the rest are
+    written in one transaction.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        records = parse_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('courses')
+        if not isinstance(data, list):
+            return jsonify({"error": "Expected a JSON array of courses or an NDJSON stream."}), 400
+        records = data
+
+    results = apply_bulk_upsert(records)
+    return jsonify({**summarize(results), "results": results})
+
+@courses_bp.route('/vector-search', methods=['POST'])
+def vector_search():
+    """
+    Rank courses by their stored embeddings.
+
+    Body: {"vector": [...]} or {"number": "<course number>"} to search with
+    that course's own embeddings, plus optional top_n, content_weight and
+    experience_weight.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        top_n = min(max(int(data.get('top_n', 10)), 1), 100)
+        content_weight = float(data.get('content_weight', course_embeddings.CONTENT_WEIGHT))
+        experience_weight = float(data.get('experience_weight', course_embeddings.EXPERIENCE_WEIGHT))
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({"error": "top_n must be an integer and the weights numbers"}), 400
+    if not (math.isfinite(content_weight) and math.isfinite(experience_weight)):
+        return jsonify({"error": "Weights must be finite numbers"}), 400
+
+    exclude_ids = ()
+    if data.get('number'):
+        course = Course.query.filter_by(number=data['number']).first()
+        if not course:
+            return jsonify({"error": "Course not found."}), 404
+        stored = course_embeddings.stored_embeddings(course)
+        if stored is None:
+            return jsonify({"error": "No embeddings stored for this course."}), 404
+        query = content_weight * stored[0] + experience_weight * stored[1]
+        exclude_ids = (course.id,)
+    elif isinstance(data.get('vector'), list) and data['vector']:
+        query = data['vector']
+    else:
+        return jsonify({"error": "Send a vector or a course number."}), 400
+
+    try:
+        hits = course_embeddings.search(query, top_n=top_n, content_weight=content_weight,
+                                        experience_weight=experience_weight, exclude_ids=exclude_ids)
+    except (TypeError, ValueError):
+        return jsonify({"error": "vector must be a list of numbers"}), 400
+
+    courses = {c.id: c for c in Course.query.filter(Course.id.in_([course_id for course_id, _ in hits])).all()}
+    result = []
+    for course_id, score in hits:
+        course = courses[course_id]
+        result.append({
+            "id": course.id,
+            "number": course.number,
+            "name": course.name,
+            "professor": course.professor,
+            "score": score,
+        })
+
+    return jsonify({"results": result})
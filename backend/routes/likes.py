@@ -0,0 +1,103 @@
+import atexit
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import bindparam, update
+from ..db import db
+from ..models.bit import Bit
+
+
+logger = logging.getLogger(__name__)
+
+
+##########################################################################
+# This defines an in-process buffer for bit like counts. Likes and       #
+# unlikes only bump a dict entry; a background thread coalesces them and #
+# writes one UPDATE per touched bit every LIKE_FLUSH_INTERVAL_MS, so a   #
+# popular bit costs one row update per interval instead of one per tap.  #
+##########################################################################
+
+class LikeCounter:
+    def __init__(self):
+        self.app = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.deltas = {}
+        self.flushing = {}  # taken out of deltas by a flush that hasn't committed yet
+
+    def ensure_started(self, app):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.app = app
+                self.thread = threading.Thread(target=self._run, name="like-counter", daemon=True)
+                self.thread.start()
+
+    def add(self, bit_id, delta=1):
+        with self.lock:
+            self.deltas[bit_id] = self.deltas.get(bit_id, 0) + delta
+
+    def pending(self, bit_id):
+        """Buffered (not yet committed) change for a bit, including a flush in progress."""
+        with self.lock:
+            return self.deltas.get(bit_id, 0) + self.flushing.get(bit_id, 0)
+
+    def count(self, bit):
+        """
+        Flushed plus buffered like count for a Bit row.
+
+        Exact for likes taken by this process. Likes buffered by other
+        processes show up once they flush, i.e. within LIKE_FLUSH_INTERVAL_MS.
+        """
+        return (bit.like_count or 0) + self.pending(bit.id)
+
+    def _run(self):
+        interval = self.app.config.get("LIKE_FLUSH_INTERVAL_MS", 500) / 1000
+        while not self.stopped.wait(interval):
+            with self.app.app_context():
+                self.flush()
+
+    def flush(self):
+        """Write every buffered delta in one batched UPDATE; failed batches are re-buffered."""
+        with self.lock:
+            deltas, self.deltas = self.deltas, {}
+            deltas = {bit_id: delta for bit_id, delta in deltas.items() if delta}
+            self.flushing = deltas
+        if not deltas:
+            return 0
+
+        stmt = (update(Bit.__table__)
+                .where(Bit.__table__.c.id == bindparam("b_id"))
+                .values(like_count=Bit.__table__.c.like_count + bindparam("delta")))
+        try:
+            db.session.execute(stmt, [{"b_id": bit_id, "delta": delta} for bit_id, delta in deltas.items()])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception("Failed to flush %d like counts; keeping them buffered", len(deltas))
+            with self.lock:
+                self.flushing = {}
+                for bit_id, delta in deltas.items():
+                    self.deltas[bit_id] = self.deltas.get(bit_id, 0) + delta
+            return 0
+        finally:
+            db.session.remove()
+        with self.lock:
+            self.flushing = {}
+        return len(deltas)
+
+    def shutdown(self):
+        self.stopped.set()
+        if self.app is not None:
+            with self.app.app_context():
+                self.flush()
+
+
+like_counter = LikeCounter()
+atexit.register(like_counter.shutdown)
+
+
+def record_like(bit_id, delta=1):
+    """Buffer a like (+1) or unlike (-1) and make sure the flusher is running."""
+    like_counter.ensure_started(current_app._get_current_object())
+    like_counter.add(bit_id, delta)
@@ -0,0 +1,58 @@
+import os
+import threading
+import numpy as np
+
+
+##########################################################################
+# This defines a read-only view of the neighbour table written by        #
+# rec_sys/neighbours.py. The file is re-read whenever its mtime changes, #
+# so incremental refreshes on the recommender side show up without a     #
+# restart, and each lookup is a dict hit plus one row slice.             #
+##########################################################################
+
+class NeighbourStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (path, mtime, numbers, rows, neighbours, scores), replaced in one
+        # assignment so a lookup never mixes rows of two different files
+        self.table = None
+
+    def _load(self, path):
+        """The current table for `path`, re-read if the file changed; None if it is missing."""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        table = self.table
+        if table is not None and table[:2] == (path, mtime):
+            return table
+
+        with self.lock:
+            table = self.table
+            if table is None or table[:2] != (path, mtime):
+                with np.load(path) as data:
+                    numbers = data["numbers"].tolist()
+                    neighbours = data["neighbours"]
+                    scores = data["scores"]
+                rows = {number: row for row, number in enumerate(numbers)}
+                table = self.table = (path, mtime, numbers, rows, neighbours, scores)
+        return table
+
+    def lookup(self, path, number, limit=None):
+        """Return [(neighbour number, score)] for a course number, or None if unknown."""
+        table = self._load(path)
+        if table is None:
+            return None
+        _, _, numbers, rows, neighbours, scores = table
+        row = rows.get(number)
+        if row is None:
+            return None
+        pairs = [
+            (numbers[j], float(s))
+            for j, s in zip(neighbours[row], scores[row])
+            if np.isfinite(s)
+        ]
+        return pairs[:limit] if limit else pairs
+
+
+neighbour_store = NeighbourStore()
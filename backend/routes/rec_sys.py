@@ -4,14 +4,25 @@ import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import json
 import openai
-import networkx as nx
 import time
+from rec_sys.course_index import CourseIndex
+from rec_sys.filter import filter_major, filter_taken
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
 
 
 # Configurations
 CONTENT_WEIGHT = 0.7
 EXPERIENCE_WEIGHT = 0.3
 TOP_N = 5
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-ada-002")
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+if genai is not None and GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 
 
@@ -34,9 +45,11 @@ def generate_user_preference_summary(user_info, courses, delay=5):
     )
     preference_text = ", ".join(preference_order[:3])
 
-    top_classes = user_info["top_classes"]
-    if len(top_classes) > 0:
-        top_classes_description = ", ".join([get_course(t, courses)['content_summary'] for t in top_classes])
+    # Top classes that left the catalog are skipped
+    top_courses = [get_course(t, courses) for t in user_info["top_classes"]]
+    summaries = [c['content_summary'] for c in top_courses if c is not None and c.get('content_summary')]
+    if summaries:
+        top_classes_description = ", ".join(summaries)
     else:
         top_classes_description = "No past top classes provided."
 
@@ -57,6 +70,13 @@ def generate_user_preference_summary(user_info, courses, delay=5):
     Return only the paragraph. Keep the paragraph to within 5 sentences.
     """
 
+    # Without Gemini, embed the profile itself rather than an error message
+    fallback = (f"Major: {user_info['major']}. Goal: {user_info['goal_description']}. "
+                f"Values courses that are {preference_text}. "
+                f"Enjoyed classes about: {top_classes_description}")
+    if genai is None or not GEMINI_API_KEY:
+        return fallback
+
     try:
         model = genai.GenerativeModel("gemini-1.5-flash")
         response = model.generate_content(prompt)
@@ -64,47 +84,8 @@ def generate_user_preference_summary(user_info, courses, delay=5):
         print(f"User preference: {response.text}")
         return response.text.strip()
     except Exception as e:
-        return f"Gemini Error: {e}"
-
-
-################################################################################
-# This function takes a graph G and a node N and removes all predecessors of N #
-################################################################################
-
-def remove_node_and_predecessors(G, target_node):
-    predecessors = nx.ancestors(G, target_node)
-    to_remove = predecessors.union({target_node})
-    G_copy = G.copy()
-    G_copy.remove_nodes_from(to_remove)
-    return G_copy
-
-
-#########################################################################
-# This defines a function that filters out all previously taken courses #
-#########################################################################
-
-def filter_taken(user, courses, course_graph):
-    taken_numbers = user['past_classes']
-    for t in taken_numbers:
-        course_graph = remove_node_and_predecessors(course_graph, t)
-    numbers = list(course_graph.nodes)
-    allowed = []
-    for n in numbers:
-        allowed.append(get_course(n, courses))
-    # print(numbers)
-    return allowed
-
-#############################################################
-# This defines a function that filters out courses by major #
-#############################################################
-
-def filter_major(major, courses):
-    allowed = []
-    for course in courses:
-        course_major = course["number"].split(" ")[0].upper()
-        if course_major == major:
-            allowed.append(course)
-    return allowed
+        print(f"Gemini Error: {e}")
+        return fallback
 
 
 class CourseRecommender:
@@ -125,10 +106,14 @@ class CourseRecommender:
         self.experience_embeddings = []
         self.combined_embeddings = []
         
-        # Generate embeddings for all courses
+        # Generate embeddings for all courses, reusing ones stored in the database
         for course in self.courses:
-            content_embedding = self._get_embedding(course['content_summary'])
-            experience_embedding = self._get_embedding(course['experience_summary'])
+            content_embedding = course.get('content_embedding')
+            if content_embedding is None:
+                content_embedding = self._get_embedding(course['content_summary'])
+            experience_embedding = course.get('experience_embedding')
+            if experience_embedding is None:
+                experience_embedding = self._get_embedding(course['experience_summary'])
             print(f"content_embedding: {len(content_embedding)}")
             print(f"experience_embedding: {len(experience_embedding)}")
             # Append embeddings to list
@@ -147,9 +132,9 @@ class CourseRecommender:
         # print(f"Loaded {len(self.courses)} courses with embeddings")
     
     def _get_embedding(self, text):
-        """Get embedding for text using OpenAI ada-002 model."""
+        """Get embedding for text using the configured OpenAI model."""
         response = openai.embeddings.create(
-            model="text-embedding-ada-002",
+            model=EMBEDDING_MODEL,
             input=text
         )
         return response.data[0].embedding
@@ -243,23 +228,28 @@ class CourseRecommender:
             
         return recommendations
     
-def recommend(user, courses, course_graph, method="preference", top_n=3):
+def recommend(user, courses, course_graph, method="preference", top_n=3, index=None):
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
-        # print("Error: OPENAI_API_KEY not found in .env file")
-        return
+        raise RuntimeError("OPENAI_API_KEY is not set")
     # Initialize the recommender
     recommender = CourseRecommender(api_key)
 
+    # One index for both filters; merge() passes its own so both passes share it
+    if index is None:
+        index = CourseIndex(courses)
+
     # preliminary filtering
-    allowed = filter_taken(user, courses, course_graph)
+    allowed = filter_taken(user, courses, course_graph, index=index)
 
     # if recommending by major
     if method == "major":
         # filter by major
-        allowed = filter_major(user["major"], allowed)
+        allowed = filter_major(user["major"], allowed, index=index)
     
     
+    if not allowed:
+        return []
     recommender.load_courses(allowed)
 
     user_preference = generate_user_preference_summary(user, courses)
@@ -281,8 +271,11 @@ def re_rank(user, courses):
     return courses
 
 def merge(user, courses, course_graph, top_n=3):
-    by_major = re_rank(user, recommend(user, courses, course_graph, method="major", top_n=top_n))
-    by_preference = re_rank(user, recommend(user, courses, course_graph, method="preference", top_n=top_n))
+    # Parse course numbers once for both passes
+    index = CourseIndex(courses)
+
+    by_major = re_rank(user, recommend(user, courses, course_graph, method="major", top_n=top_n, index=index))
+    by_preference = re_rank(user, recommend(user, courses, course_graph, method="preference", top_n=top_n, index=index))
 
     combined_scores = {}
 
@@ -296,5 +289,5 @@ def merge(user, courses, course_graph, top_n=3):
     merged = sorted(combined_scores.keys(), key=lambda x: combined_scores.get(x), reverse=True)
     # print(f"Recommended Courses: {merged}")
 
-    return [get_course(course, courses) for course in merged[:top_n]]
+    return [courses[index.lookup(course)] for course in merged[:top_n]]
 
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func
+from ..db import db
+from ..models.course import Course
+from ..models.user import User
+from ..models.recommendation import Recommendation
+from .rec_sys import merge, rank
+from .course_embeddings import stored_embeddings
+from .response_cache import response_cache
+from rec_sys.digraph import build_course_graph
+
+
+# Configurations
+MODEL_VERSION = "merge-v1"
+TOP_N = 10
+SCAN_INTERVAL = 300  # seconds between sweeps for users with stale rows
+RETRY_BACKOFF = 300  # seconds before a failed refresh is retried, doubled per failure
+MAX_RETRY_BACKOFF = 6 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+def user_payload(user):
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "major": user.major,
+        "goal_description": user.goal_description,
+        "past_classes": user.past_classes or [],
+        "top_classes": user.top_classes or [],
+        "radar": {
+            "liked": user.liked or 0,
+            "difficulty": user.difficulty or 0,
+            "practicality": user.practicality or 0,
+            "collaborative": user.collaborative or 0,
+            "rewarding": user.rewarding or 0,
+            "instruction": user.instruction or 0,
+        }
+    }
+
+
+def course_payload(course):
+    payload = {
+        "id": course.id,
+        "number": course.number,
+        "name": course.name,
+        "professor": course.professor,
+        "requirements": course.requirements,
+        "prerequisites": course.prerequisites or [],
+        "description": course.description,
+        "content_summary": course.content_summary,
+        "experience_summary": course.experience_summary,
+        "radar": {
+            "liked": course.liked or 0,
+            "difficulty": course.difficulty or 0,
+            "practicality": course.practicality or 0,
+            "collaborative": course.collaborative or 0,
+            "rewarding": course.rewarding or 0,
+            "instruction": course.instruction or 0,
+        }
+    }
+    # Stored embeddings let the recommender skip re-embedding this course
+    stored = stored_embeddings(course)
+    if stored is not None:
+        payload["content_embedding"], payload["experience_embedding"] = stored
+    return payload
+
+
+def compute_catalog_version():
+    """Catalog version from one count/max(updated_at) query; cheap enough to run per request."""
+    count, latest = db.session.query(func.count(Course.id), func.max(Course.updated_at)).one()
+    return f"{count}:{latest.isoformat() if latest else ''}"
+
+
+##########################################################################
+# This defines the background worker that fills the recommendations      #
+# table. Reads never run the pipeline: they enqueue stale users here and #
+# keep serving the previous rows until the refresh lands.                #
+##########################################################################
+
+class RecommendationWorker:
+    def __init__(self, top_n=TOP_N, interval=SCAN_INTERVAL):
+        self.top_n = top_n
+        self.interval = interval
+        self.app = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pending = set()
+        # user_id -> (profile_version, catalog_version, failures, retry_at).
+        # Kept per process: a refresh that keeps failing for the same inputs
+        # is retried with exponential backoff instead of on every sweep.
+        self.failures = {}
+
+    def ensure_started(self, app):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.app = app
+                self.thread = threading.Thread(target=self._run, name="recommendation-worker", daemon=True)
+                self.thread.start()
+
+    def request_refresh(self, user_id):
+        with self.lock:
+            self.pending.add(user_id)
+        self.wakeup.set()
+
+    def catalog_changed(self):
+        """Wake the worker after a course write; staleness itself is read from the catalog version."""
+        self.wakeup.set()
+
+    def is_stale(self, user, rows, catalog_version=None):
+        if not rows:
+            return True
+        if catalog_version is None:
+            catalog_version = compute_catalog_version()
+        return (rows[0].profile_version != (user.profile_version or 0) or
+                rows[0].catalog_version != catalog_version)
+
+    def is_due(self, user, catalog_version):
+        """False while a refresh that failed for these same inputs is backing off."""
+        failure = self.failures.get(user.id)
+        if failure is None or failure[:2] != (user.profile_version or 0, catalog_version):
+            return True
+        return time.time() >= failure[3]
+
+    def _record_failure(self, user, catalog_version):
+        failure = self.failures.get(user.id)
+        same_inputs = failure is not None and failure[:2] == (user.profile_version or 0, catalog_version)
+        failures = failure[2] + 1 if same_inputs else 1
+        delay = min(RETRY_BACKOFF * 2 ** (failures - 1), MAX_RETRY_BACKOFF)
+        self.failures[user.id] = (user.profile_version or 0, catalog_version, failures, time.time() + delay)
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            with self.app.app_context():
+                try:
+                    catalog_version = compute_catalog_version()
+                    with self.lock:
+                        user_ids, self.pending = self.pending | set(self._stale_user_ids(catalog_version)), set()
+                    for user_id in user_ids:
+                        self.refresh_user(user_id, catalog_version)
+                except Exception:
+                    logger.exception("Recommendation sweep failed")
+                finally:
+                    db.session.remove()
+
+    def _stale_user_ids(self, catalog_version):
+        """Users with no rows, or rows computed for an older profile or catalog."""
+        latest = (db.session.query(Recommendation.user_id,
+                                   Recommendation.profile_version,
+                                   Recommendation.catalog_version)
+                  .filter(Recommendation.rank == 0)
+                  .subquery())
+        rows = (db.session.query(User.id)
+                .outerjoin(latest, latest.c.user_id == User.id)
+                .filter((latest.c.user_id.is_(None)) |
+                        (latest.c.profile_version != User.profile_version) |
+                        (latest.c.catalog_version != catalog_version))
+                .all())
+        return [user_id for (user_id,) in rows]
+
+    def refresh_user(self, user_id, catalog_version=None):
+        """
+        Recompute one user's recommendations and replace their rows atomically.
+
+        Returns:
+            bool: True if rows were written; False if the user is gone, is
+                  backing off after a failure, or the refresh failed
+        """
+        user = User.query.get(user_id)
+        if user is None:
+            return False
+        if catalog_version is None:
+            catalog_version = compute_catalog_version()
+        if not self.is_due(user, catalog_version):
+            return False
+        try:
+            user_data = user_payload(user)
+            course_data = [course_payload(c) for c in Course.query.all()]
+            recommended = merge(user_data, course_data, build_course_graph(course_data), top_n=self.top_n)
+            if not recommended:
+                raise RuntimeError("The pipeline returned no courses")
+
+            computed_at = datetime.utcnow()
+            Recommendation.query.filter_by(user_id=user.id).delete()
+            for position, course in enumerate(recommended):
+                db.session.add(Recommendation(
+                    user_id=user.id,
+                    rank=position,
+                    course_id=course["id"],
+                    score=rank(user_data, course),
+                    model_version=MODEL_VERSION,
+                    profile_version=user.profile_version or 0,
+                    catalog_version=catalog_version,
+                    computed_at=computed_at,
+                ))
+            db.session.commit()
+            response_cache.invalidate(f"user:{user.id}:recommendations")
+        except Exception:
+            db.session.rollback()
+            self._record_failure(user, catalog_version)
+            logger.exception("Failed to refresh recommendations for user %s", user_id)
+            return False
+        self.failures.pop(user.id, None)
+        return True
+
+
+recommendation_worker = RecommendationWorker()
@@ -0,0 +1,176 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+
+
+# Configurations: TTLs (seconds) of the cached read endpoints
+COURSE_TTL = 300
+SAVED_COURSES_TTL = 120
+RECOMMENDATIONS_TTL = 60
+FEED_TTL = 5  # like counts in the feed may lag by this much
+REPLAYED_HEADERS = ("X-Next-Cursor",)
+
+
+class LRUBackend:
+    """In-process LRU with per-entry expiry. Invalidation only reaches this process."""
+
+    def __init__(self, max_entries=10000):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.generations = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_generations(self, namespaces):
+        return [self.generations.get(namespace, 0) for namespace in namespaces]
+
+    def bump(self, namespace):
+        with self.lock:
+            self.generations[namespace] = self.generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Shared backend for anything speaking the Redis protocol; needs the `redis` package."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE points at Redis but the `redis` package is not installed")
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def get_generations(self, namespaces):
+        return [int(value or 0) for value in self.client.mget([f"gen:{n}" for n in namespaces])]
+
+    def bump(self, namespace):
+        self.client.incr(f"gen:{namespace}")
+
+
+##########################################################################
+# This defines the response cache for hot read endpoints. Entries live   #
+# under namespaces ("courses", "user:<id>:saved", ...) whose generation  #
+# number is part of the key, so a write invalidates a whole namespace by #
+# bumping one counter; the orphaned entries age out through TTL and LRU. #
+##########################################################################
+
+class ResponseCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._backend = None
+
+    def backend(self):
+        """Backend for RESPONSE_CACHE ("lru", "redis://...", or "off" for None), built on first use."""
+        if self._backend is None:
+            with self.lock:
+                if self._backend is None:
+                    setting = current_app.config.get("RESPONSE_CACHE", "lru")
+                    if setting == "off":
+                        self._backend = False
+                    elif setting.startswith(("redis://", "rediss://", "unix://")):
+                        self._backend = RedisBackend.from_url(setting)
+                    else:
+                        self._backend = LRUBackend(current_app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 10000))
+        return self._backend or None
+
+    def use(self, backend):
+        """Swap in a backend, e.g. a Redis stand-in; None turns caching off."""
+        self._backend = backend if backend is not None else False
+
+    def invalidate(self, *namespaces):
+        backend = self.backend()
+        if backend is None:
+            return
+        for namespace in namespaces:
+            backend.bump(namespace)
+
+    def key(self, backend, namespaces):
+        generations = backend.get_generations(namespaces)
+        tag = ",".join(f"{n}={gen}" for n, gen in zip(namespaces, generations))
+        digest = hashlib.sha1(f"{request.endpoint}|{request.full_path}|{tag}".encode("utf-8")).hexdigest()
+        return f"resp:{request.endpoint}:{digest}"
+
+
+response_cache = ResponseCache()
+
+
+def skip():
+    """Keep the current response out of the cache (e.g. it is about to change)."""
+    g.skip_response_cache = True
+
+
+def _pack(response):
+    meta = {"status": response.status_code, "mimetype": response.mimetype,
+            "headers": {h: response.headers[h] for h in REPLAYED_HEADERS if h in response.headers}}
+    return json.dumps(meta).encode("utf-8") + b"\n" + response.get_data()
+
+
+def _unpack(value):
+    meta, body = value.split(b"\n", 1)
+    meta = json.loads(meta)
+    response = current_app.response_class(body, status=meta["status"], mimetype=meta["mimetype"])
+    response.headers.update(meta["headers"])
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    return response.make_conditional(request)
+
+
+def cached(ttl, namespaces):
+    """
+    Cache a GET view's successful responses.
+
+    Args:
+        ttl (int): Seconds an entry may be served
+        namespaces (callable): Gets the view's kwargs, returns the
+                               namespaces whose writes invalidate it
+
+    Hits are replayed with a strong ETag, so If-None-Match still gets 304.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = response_cache.backend()
+            if backend is None or request.method != "GET":
+                return view(*args, **kwargs)
+
+            key = response_cache.key(backend, namespaces(**kwargs))
+            value = backend.get(key)
+            if value is not None:
+                return _unpack(value)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough and not g.pop("skip_response_cache", False):
+                backend.set(key, _pack(response), ttl)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from flask import current_app, request
+
+
+# Configurations
+RADAR_FIELDS = ("liked", "difficulty", "practicality", "collaborative", "rewarding", "instruction")
+
+
+def _radar(course):
+    return {field: getattr(course, field) for field in RADAR_FIELDS}
+
+
+def course_detail(course):
+    """Course page shape (by_number / by_id)."""
+    return {
+        "id": course.id,
+        "number": course.number,
+        "name": course.name,
+        "professor": course.professor,
+        "quote": course.quote,
+        "requirements": course.requirements,
+        "prerequisites": course.prerequisites,
+        "description": course.description,
+        "radar": _radar(course),
+    }
+
+
+def course_card(course):
+    """List shape used by saved and recommended courses."""
+    return {
+        "id": course.id,
+        "number": course.number,
+        "name": course.name,
+        "professor": course.professor,
+        "quote": course.quote,
+        "requirements": course.requirements,
+        "prerequisites": course.prerequisites,
+        "description": course.description,
+        "radarData": _radar(course),
+    }
+
+
+def course_embedding(course):
+    """Detail shape plus the summaries the recommender embeds."""
+    return dict(course_detail(course),
+                content_summary=course.content_summary,
+                experience_summary=course.experience_summary)
+
+
+# Columns behind each key of the embedding view, for exports that project
+# a subset of keys straight from the query instead of loading Course rows
+EMBEDDING_FIELDS = {
+    "id": ("id",),
+    "number": ("number",),
+    "name": ("name",),
+    "professor": ("professor",),
+    "quote": ("quote",),
+    "requirements": ("requirements",),
+    "prerequisites": ("prerequisites",),
+    "description": ("description",),
+    "radar": RADAR_FIELDS,
+    "content_summary": ("content_summary",),
+    "experience_summary": ("experience_summary",),
+}
+
+
+def embedding_row(row, fields):
+    """Embedding view of a projected row (a mapping of column values), limited to `fields`."""
+    out = {}
+    for field in fields:
+        if field == "radar":
+            out[field] = {column: row[column] for column in RADAR_FIELDS}
+        else:
+            out[field] = row[field]
+    return out
+
+
+VIEWS = {
+    "detail": course_detail,
+    "card": course_card,
+    "embedding": course_embedding,
+}
+
+
+#########################################################################
+# This defines a cache of serialized course JSON. Entries are keyed by  #
+# (view, course id) and stamped with the row version (updated_at), so a #
+# write made through any process is picked up on the next read, and     #
+# /api/courses/add-update also drops the entry here right away.         #
+#########################################################################
+
+class CourseJSONCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, course, view):
+        """Serialized JSON bytes for one course in the given view."""
+        key = (view, course.id)
+        version = course.updated_at
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        body = current_app.json.dumps(VIEWS[view](course)).encode("utf-8")
+        with self.lock:
+            self.entries[key] = (version, body)
+        return body
+
+    def invalidate(self, course_id=None):
+        """Drop one course's entries, or everything."""
+        with self.lock:
+            if course_id is None:
+                self.entries.clear()
+            else:
+                for view in VIEWS:
+                    self.entries.pop((view, course_id), None)
+
+
+course_json = CourseJSONCache()
+
+
+def json_list(courses, view):
+    return b"[" + b",".join(course_json.get(course, view) for course in courses) + b"]"
+
+
+def json_object(**fields):
+    """Assemble a JSON object from pre-serialized bytes and plain values, keys sorted like jsonify."""
+    parts = []
+    for key in sorted(fields):
+        value = fields[key]
+        if not isinstance(value, bytes):
+            value = current_app.json.dumps(value).encode("utf-8")
+        parts.append(current_app.json.dumps(key).encode("utf-8") + b":" + value)
+    return b"{" + b",".join(parts) + b"}"
+
+
+def json_response(body, status=200):
+    """
+    Response for pre-serialized JSON with a strong ETag.
+
+    A request whose If-None-Match matches gets an empty 304 instead.
+    """
+    response = current_app.response_class(body, status=status, mimetype="application/json")
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    return response.make_conditional(request)
@@ -0,0 +1,122 @@
+import click
+from flask import current_app
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from ..db import db
+from ..models.bit import Bit
+from ..models.user import User
+from ..models.timeline import TimelineEntry
+from ..models.associations import saved_courses
+
+
+# Configurations
+TIMELINE_LENGTH = 500  # newest entries kept per user
+
+
+def enabled():
+    return current_app.config.get("BIT_TIMELINES", False)
+
+
+##########################################################################
+# These functions keep per-user bit timelines (fan-out on write). A new  #
+# bit is pushed to everyone who saved its course; saving or unsaving a   #
+# course backfills or prunes one user's timeline. Each timeline is kept  #
+# to the newest TIMELINE_LENGTH entries, so a feed read is a range scan. #
+##########################################################################
+
+def _insert_ignoring_duplicates(rows_select):
+    stmt = insert(TimelineEntry.__table__).from_select(["user_id", "bit_id", "created_at"], rows_select)
+    db.session.execute(stmt.on_conflict_do_nothing())
+
+
+def _trim(user_ids):
+    """Drop entries beyond TIMELINE_LENGTH for the given users' timelines."""
+    ranked = (select(TimelineEntry.user_id, TimelineEntry.bit_id,
+                     func.row_number().over(partition_by=TimelineEntry.user_id,
+                                            order_by=(TimelineEntry.created_at.desc(),
+                                                      TimelineEntry.bit_id.desc())).label("position"))
+              .where(TimelineEntry.user_id.in_(user_ids))
+              .subquery())
+    overflow = select(ranked.c.user_id, ranked.c.bit_id).where(ranked.c.position > TIMELINE_LENGTH)
+    (TimelineEntry.query
+     .filter(tuple_(TimelineEntry.user_id, TimelineEntry.bit_id).in_(overflow))
+     .delete(synchronize_session=False))
+
+
+def fan_out(bit):
+    """Push a new bit into the timeline of every user who saved its course."""
+    followers = select(saved_courses.c.user_id).where(saved_courses.c.course_id == bit.course_id)
+    _insert_ignoring_duplicates(
+        select(saved_courses.c.user_id, db.literal(bit.id), db.literal(bit.created_at))
+        .where(saved_courses.c.course_id == bit.course_id)
+        .distinct()
+    )
+    _trim(followers)
+
+
+def backfill(user_id, course_id):
+    """Add a newly saved course's most recent bits to the user's timeline."""
+    recent = (select(db.literal(user_id), Bit.id, Bit.created_at)
+              .where(Bit.course_id == course_id)
+              .order_by(Bit.created_at.desc(), Bit.id.desc())
+              .limit(TIMELINE_LENGTH))
+    _insert_ignoring_duplicates(recent)
+    _trim([user_id])
+
+
+def prune(user_id, course_id):
+    """
+    Remove an unsaved course's bits from the user's timeline.
+
+    Older bits of other courses that were trimmed earlier are not pulled
+    back in; `flask rebuild-timelines --user-id` does that if it matters.
+    """
+    course_bits = select(Bit.id).where(Bit.course_id == course_id)
+    (TimelineEntry.query
+     .filter(TimelineEntry.user_id == user_id, TimelineEntry.bit_id.in_(course_bits))
+     .delete(synchronize_session=False))
+
+
+def rebuild(user_id):
+    """Recompute a user's timeline from their saved courses."""
+    TimelineEntry.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    saved = select(saved_courses.c.course_id).where(saved_courses.c.user_id == user_id)
+    _insert_ignoring_duplicates(
+        select(db.literal(user_id), Bit.id, Bit.created_at)
+        .where(Bit.course_id.in_(saved))
+        .order_by(Bit.created_at.desc(), Bit.id.desc())
+        .limit(TIMELINE_LENGTH)
+    )
+
+
+def read(user_id, after=None, limit=20):
+    """
+    One page of a user's timeline, newest first.
+
+    Args:
+        user_id (int): Timeline owner
+        after (tuple): (created_at, bit_id) of the last entry already served
+        limit (int): Page size
+
+    Returns:
+        list: Bits, with one extra when there is a next page
+    """
+    query = (db.session.query(Bit)
+             .join(TimelineEntry, TimelineEntry.bit_id == Bit.id)
+             .filter(TimelineEntry.user_id == user_id)
+             .order_by(TimelineEntry.created_at.desc(), TimelineEntry.bit_id.desc()))
+    if after is not None:
+        query = query.filter(tuple_(TimelineEntry.created_at, TimelineEntry.bit_id) < after)
+    return query.limit(limit + 1).all()
+
+
+def register_commands(app):
+    @app.cli.command("rebuild-timelines")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild this user's timeline")
+    def rebuild_timelines(user_id):
+        """Backfill bit timelines, e.g. after enabling BIT_TIMELINES."""
+        user_ids = [user_id] if user_id else [uid for (uid,) in db.session.query(User.id).all()]
+        for uid in user_ids:
+            rebuild(uid)
+        db.session.commit()
+        click.echo(f"✅ Rebuilt {len(user_ids)} timelines")
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import numpy as np
+from flask import current_app
+from ..db import db
+
+
+# Configurations: EMA step per event; negative steps move the vector away
+EVENT_RATES = {
+    "save": 0.2,
+    "like": 0.1,
+    "unsave": -0.1,
+}
+
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+##########################################################################
+# This defines a read-only view of the course vectors in the recommender #
+# snapshot written by rec_sys/app.py, re-read whenever the file changes. #
+##########################################################################
+
+class CourseVectorStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (path, mtime, rows, vectors, model), replaced in one assignment so
+        # a read never mixes rows of one snapshot with vectors of another
+        self.snapshot = None
+
+    def _load(self, path):
+        """The current snapshot for `path`, re-read if the file changed; None if it is missing."""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        loaded = self.snapshot
+        if loaded is not None and loaded[:2] == (path, mtime):
+            return loaded
+
+        with self.lock:
+            loaded = self.snapshot
+            if loaded is None or loaded[:2] != (path, mtime):
+                with np.load(path) as snapshot:
+                    courses = json.loads(str(snapshot["courses"]))
+                    content_weight, experience_weight = snapshot["weights"].tolist()
+                    combined = (snapshot["content_embeddings"] * content_weight +
+                                snapshot["experience_embeddings"] * experience_weight)
+                    model = str(snapshot["embedding_model"]) if "embedding_model" in snapshot else None
+                rows = {(c.get("number") or c.get("course_number")): row for row, c in enumerate(courses)}
+                loaded = self.snapshot = (path, mtime, rows, combined.astype(np.float32), model)
+        return loaded
+
+    def get(self, path, number):
+        """Return (stored combined vector, embedding model) for a course number, or None."""
+        loaded = self._load(path)
+        if loaded is None:
+            return None
+        _, _, rows, vectors, model = loaded
+        row = rows.get(number)
+        return None if row is None else (vectors[row], model)
+
+
+course_vectors = CourseVectorStore()
+
+
+def load_user_vector(user):
+    if not user.embedding:
+        return None
+    return np.frombuffer(user.embedding, dtype=np.float32)
+
+
+def apply_event(user, course, event):
+    """
+    Nudge a user's recommendation vector after a save, unsave or like.
+
+    The new vector is an exponential moving average step toward (save/like)
+    or away from (unsave) the course's stored vector, re-normalised and
+    persisted on the user. profile_version is bumped so any recommendations
+    cached for the previous profile are treated as stale. Makes no external
+    calls; the caller commits the session.
+
+    Args:
+        user (User): User who triggered the event
+        course (Course): Course that was saved, unsaved or liked
+        event (str): One of EVENT_RATES
+
+    Returns:
+        bool: Whether the user's vector changed
+    """
+    stored = course_vectors.get(current_app.config["REC_SNAPSHOT_PATH"], course.number)
+    if stored is None:
+        return False
+    course_vector, model = stored
+
+    rate = EVENT_RATES[event]
+    current = load_user_vector(user)
+    if current is None or len(current) != len(course_vector) or user.embedding_model != model:
+        # Nothing to move away from yet; a first positive event seeds the vector
+        if rate <= 0:
+            return False
+        updated = _unit(course_vector)
+    else:
+        updated = _unit((1 - abs(rate)) * current + rate * _unit(course_vector))
+
+    user.embedding = updated.astype(np.float32).tobytes()
+    user.embedding_model = model
+    user.profile_version = (user.profile_version or 0) + 1
+    db.session.add(user)
+    return True
@@ -1,9 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g, stream_with_context
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import joinedload
 from ..models.course import Course
 from ..models.user import User
+from ..models.recommendation import Recommendation
+from ..models.associations import saved_courses
 from ..db import db
 from .rec_sys import merge
-from ..rec_sys.digraph import build_course_graph
+from .collab import item_model
+from .user_vectors import apply_event
+from .rec_worker import compute_catalog_version, recommendation_worker
+from . import timelines
+from .response_cache import RECOMMENDATIONS_TTL, SAVED_COURSES_TTL, cached, response_cache
+from .response_cache import skip as skip_response_cache
+from .serializers import EMBEDDING_FIELDS, embedding_row, json_list, json_object, json_response
+from rec_sys.digraph import build_course_graph
 import os
 from dotenv import load_dotenv
 
@@ -14,44 +26,72 @@ load_dotenv(dotenv_path=dotenv_path)
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+# Configurations
+EMBEDDING_STREAM_BATCH = 500  # rows fetched from the server-side cursor per NDJSON chunk
+MAX_BULK_SAVES = 500
+
+
+def _change_saves(user, save_ids=(), unsave_ids=()):
+    """
+    Save and unsave courses with direct saved_courses statements.
+
+    Membership is decided by the INSERT ... ON CONFLICT DO NOTHING / DELETE
+    themselves (RETURNING says which rows changed), so the user's
+    saved_courses collection is never loaded. Only changed saves nudge the
+    user's vector, touch the timeline and feed the item model.
+
+    Returns:
+        tuple: (saved course ids, unsaved course ids) that actually changed
+    """
+    saved, unsaved = [], []
+    if save_ids:
+        stmt = (insert(saved_courses)
+                .values([{"user_id": user.id, "course_id": course_id} for course_id in save_ids])
+                .on_conflict_do_nothing()
+                .returning(saved_courses.c.course_id))
+        saved = [course_id for (course_id,) in db.session.execute(stmt)]
+    if unsave_ids:
+        stmt = (delete(saved_courses)
+                .where(saved_courses.c.user_id == user.id, saved_courses.c.course_id.in_(unsave_ids))
+                .returning(saved_courses.c.course_id))
+        unsaved = [course_id for (course_id,) in db.session.execute(stmt)]
+    if not saved and not unsaved:
+        return saved, unsaved
+
+    courses = {c.id: c for c in Course.query.filter(Course.id.in_(saved + unsaved)).all()}
+    for course_id in saved:
+        apply_event(user, courses[course_id], "save")
+        if timelines.enabled():
+            timelines.backfill(user.id, course_id)
+    for course_id in unsaved:
+        apply_event(user, courses[course_id], "unsave")
+        if timelines.enabled():
+            timelines.prune(user.id, course_id)
+    db.session.commit()
+    response_cache.invalidate(f"user:{user.id}:saved", f"user:{user.id}:recommendations")
+
+    for course_id in saved:
+        item_model.record_save(user.id, course_id)
+    for course_id in unsaved:
+        item_model.record_unsave(user.id, course_id)
+    return saved, unsaved
+
+
 @users_bp.route('/<int:user_id>/save_course', methods=['POST'])
 def save_course(user_id):
     data = request.get_json()
     course_id = data.get('course_id')
     user = User.query.get_or_404(user_id)
     course = Course.query.get_or_404(course_id)
-    if course not in user.saved_courses:
-        user.saved_courses.append(course)
-        db.session.commit()
+    _change_saves(user, save_ids=[course.id])
     return jsonify({"message": "Course saved successfully."})
 
 @users_bp.route('/<int:user_id>/saved_courses', methods=['GET'])
+@cached(SAVED_COURSES_TTL, lambda user_id: ["courses", f"user:{user_id}:saved"])
 def get_saved_courses(user_id):
-    user = User.query.get_or_404(user_id)
-    courses = user.saved_courses
-
-    result = []
-    for course in courses:
-        result.append({
-            "id": course.id,
-            "number": course.number,
-            "name": course.name,
-            "professor": course.professor,
-            "quote": course.quote,
-            "requirements": course.requirements,
-            "prerequisites": course.prerequisites,
-            "description": course.description,
-            "radarData": {
-                "liked": course.liked,
-                "difficulty": course.difficulty,
-                "practicality": course.practicality,
-                "collaborative": course.collaborative,
-                "rewarding": course.rewarding,
-                "instruction": course.instruction,
-            }
-        })
-
-    return jsonify(result)
+    # User and saved courses in one joined query
+    user = User.query.options(joinedload(User.saved_courses)).filter_by(id=user_id).first_or_404()
+    return json_response(json_list(user.saved_courses, "card"))
 
 @users_bp.route('/<int:user_id>/unsave_course', methods=['POST'])
 def unsave_course(user_id):
@@ -65,13 +105,46 @@ def unsave_course(user_id):
     course = Course.query.get_or_404(course_id)
 
     # Remove the association if it exists
-    if course in user.saved_courses:
-        user.saved_courses.remove(course)
-        db.session.commit()
+    _, unsaved = _change_saves(user, unsave_ids=[course.id])
+    if unsaved:
         return jsonify({"message": "Course unsaved successfully"}), 200
     else:
         return jsonify({"error": "Course not found in user's saved courses"}), 404
 
+@users_bp.route('/<int:user_id>/saved_courses/bulk', methods=['POST'])
+def bulk_save_courses(user_id):
+    """
+    Save and unsave many courses in one request.
+
+    Body: {"save": [course ids], "unsave": [course ids]}. Ids that don't
+    exist come back under "missing"; ids already in the requested state
+    under "unchanged".
+    """
+    data = request.get_json(silent=True) or {}
+    save_ids, unsave_ids = data.get('save', []), data.get('unsave', [])
+    for ids in (save_ids, unsave_ids):
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({"error": "save and unsave must be lists of course ids"}), 400
+    if len(save_ids) + len(unsave_ids) > MAX_BULK_SAVES:
+        return jsonify({"error": f"At most {MAX_BULK_SAVES} course ids per request"}), 400
+    if set(save_ids) & set(unsave_ids):
+        return jsonify({"error": "A course can't be both saved and unsaved"}), 400
+
+    user = User.query.get_or_404(user_id)
+    requested = set(save_ids) | set(unsave_ids)
+    existing = {course_id for (course_id,) in
+                db.session.query(Course.id).filter(Course.id.in_(requested)).all()} if requested else set()
+
+    saved, unsaved = _change_saves(user,
+                                   save_ids=sorted(set(save_ids) & existing),
+                                   unsave_ids=sorted(set(unsave_ids) & existing))
+    return jsonify({
+        "saved": sorted(saved),
+        "unsaved": sorted(unsaved),
+        "unchanged": sorted(existing - set(saved) - set(unsaved)),
+        "missing": sorted(requested - existing),
+    })
+
 
 @users_bp.route('/create', methods=['POST'])
 def create_user():
@@ -125,25 +198,86 @@ def create_user():
     return jsonify({"message": "User created successfully", "user_id": user.id}), 201
 
 
+def _recommendation_namespaces(user_id):
+    """
+    Cache namespaces of a user's recommendations.
+
+    Generation bumps only reach other processes through a shared backend,
+    so the key also names the versions the response depends on (profile,
+    catalog and when the rows were computed). A refresh or catalog change
+    made by any process then misses a per-process LRU straight away.
+    """
+    catalog_version = compute_catalog_version()
+    g.catalog_version = catalog_version  # reused by the view
+    computed_at = (select(func.max(Recommendation.computed_at))
+                   .where(Recommendation.user_id == user_id)
+                   .scalar_subquery())
+    profile_version, latest = (db.session.query(User.profile_version, computed_at)
+                               .filter(User.id == user_id)
+                               .first() or (None, None))
+    versions = f"{profile_version}:{catalog_version}:{latest.isoformat() if latest else ''}"
+    return ["courses", f"user:{user_id}:recommendations", f"user:{user_id}:recommendations@{versions}"]
+
+
 @users_bp.route('/get_recommended_courses/<int:user_id>', methods=['GET'])
+@cached(RECOMMENDATIONS_TTL, _recommendation_namespaces)
 def get_recommended_courses(user_id):
     user = User.query.get_or_404(user_id)
 
+    # Precomputed rows (one indexed query); stale or missing rows are served
+    # as-is while the background worker recomputes them
+    rows = (Recommendation.query
+            .filter_by(user_id=user.id)
+            .options(joinedload(Recommendation.course))
+            .order_by(Recommendation.rank)
+            .all())
+
+    catalog_version = g.get("catalog_version") or compute_catalog_version()
+    stale = recommendation_worker.is_stale(user, rows, catalog_version)
+    if stale:
+        # Users whose last refresh failed for these inputs wait out the backoff
+        if recommendation_worker.is_due(user, catalog_version):
+            recommendation_worker.ensure_started(current_app._get_current_object())
+            recommendation_worker.request_refresh(user.id)
+        # Fresh rows are on their way; don't pin these ones in the cache
+        skip_response_cache()
+
+    if rows:
+        recommended_courses = [row.course for row in rows]
+    else:
+        # Nothing computed yet for this user
+        recommended_courses = Course.query.limit(10).all()
+
+    return json_response(json_object(
+        courses=json_list(recommended_courses, "card"),
+        stale=stale,
+        model_version=rows[0].model_version if rows else None,
+        computed_at=rows[0].computed_at.isoformat() if rows else None,
+    ))
+
+
+@users_bp.route('/<int:user_id>/collab_recommendations', methods=['GET'])
+def get_collab_recommendations(user_id):
+    user = User.query.get_or_404(user_id)
+    top_n = request.args.get('top_n', 10, type=int)
+
+    # Item-item scores from saved courses only; no LLM or embedding calls
+    item_model.ensure_built()
+    scored = item_model.recommend(user.id, top_n=top_n)
 
-    # This is a placeholder. Replace with your actual recommendation logic!
-    recommended_courses = Course.query.limit(10).all()
+    courses = {c.id: c for c in Course.query.filter(Course.id.in_([cid for cid, _ in scored])).all()}
 
     course_list = []
-    for course in recommended_courses:
+    for course_id, score in scored:
+        course = courses.get(course_id)
+        if course is None:
+            continue
         course_list.append({
             "id": course.id,
             "number": course.number,
             "name": course.name,
             "professor": course.professor,
-            "quote": course.quote,
-            "requirements": course.requirements,
-            "prerequisites": course.prerequisites,
-            "description": course.description,
+            "score": score,
             "radarData": {
                 "liked": course.liked,
                 "difficulty": course.difficulty,
@@ -157,16 +291,53 @@ def get_recommended_courses(user_id):
     return jsonify({"courses": course_list})
 
 
+def _stream_embedding_data(user_data, past_course_numbers, fields):
+    """
+    NDJSON export: a {"user": ...} line, then one line per available course.
+
+    Rows come from a server-side cursor EMBEDDING_STREAM_BATCH at a time and
+    only the requested columns are selected, so memory stays flat however
+    large the catalog is. Each batch is written out as one chunk.
+    """
+    columns = [getattr(Course, column) for field in fields for column in EMBEDDING_FIELDS[field]]
+    stmt = (select(*columns)
+            .where(~Course.number.in_(past_course_numbers))
+            .order_by(Course.id)
+            .execution_options(yield_per=EMBEDDING_STREAM_BATCH))
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield dumps({"user": user_data}) + "\n"
+        for rows in db.session.execute(stmt).mappings().partitions():
+            yield "".join(dumps(embedding_row(row, fields)) + "\n" for row in rows)
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @users_bp.route('/<int:user_id>/embedding_data', methods=['GET'])
 def get_embedding_data(user_id):
+    """
+    The user's profile and every course they haven't taken.
+
+    ?format=ndjson (or Accept: application/x-ndjson) streams the result
+    instead; ?fields=number,content_summary,... limits the course keys.
+    """
     user = User.query.get_or_404(user_id)
-    
+
+    stream = (request.args.get('format') == 'ndjson' or
+              request.accept_mimetypes.best == 'application/x-ndjson')
+    fields = list(EMBEDDING_FIELDS)
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in EMBEDDING_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+        if not stream:
+            return jsonify({"error": "fields is only supported with format=ndjson"}), 400
+
     # Get list of course numbers the user has already taken
     past_course_numbers = user.past_classes or []
 
-    # Filter out courses the user already took
-    available_courses = Course.query.filter(~Course.number.in_(past_course_numbers)).all()
-
     # Structure user data
     user_data = {
         "user_id": user.id,
@@ -186,34 +357,17 @@ def get_embedding_data(user_id):
         }
     }
 
-    # Structure course data
-    course_data = []
-    for course in available_courses:
-        course_data.append({
-            "id": course.id,
-            "number": course.number,
-            "name": course.name,
-            "professor": course.professor,
-            "quote": course.quote,
-            "requirements": course.requirements,
-            "prerequisites": course.prerequisites,
-            "description": course.description,
-            "content_summary": course.content_summary,
-            "experience_summary": course.experience_summary,
-            "radar": {
-                "liked": course.liked,
-                "difficulty": course.difficulty,
-                "practicality": course.practicality,
-                "collaborative": course.collaborative,
-                "rewarding": course.rewarding,
-                "instruction": course.instruction,
-            }
-        })
+    if stream:
+        return _stream_embedding_data(user_data, past_course_numbers, fields)
 
-    return jsonify({
-        "user": user_data,
-        "courses": course_data
-    })
+    # Filter out courses the user already took
+    available_courses = Course.query.filter(~Course.number.in_(past_course_numbers)).all()
+
+    # Course data comes pre-serialized from the course JSON cache
+    return json_response(json_object(
+        user=user_data,
+        courses=json_list(available_courses, "embedding"),
+    ))
 
 
 
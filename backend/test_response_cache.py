@@ -0,0 +1,234 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from backend.routes import response_cache as response_cache_module
+from backend.routes.response_cache import LRUBackend, RedisBackend
+
+
+# The Flask tests recreate every table, so they only run against a throwaway
+# database: TEST_DATABASE_URL=postgresql://... python -m pytest backend
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+needs_database = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+class FakeRedis:
+    """The few Redis commands RedisBackend uses, over a dict (expiry is not modelled)."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key) or 0) + 1
+        return self.store[key]
+
+
+def test_lru_evicts_least_recently_used():
+    backend = LRUBackend(max_entries=2)
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    backend.get("a")
+    backend.set("c", b"3", 60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+    assert backend.get("c") == b"3"
+
+
+def test_lru_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "monotonic", lambda: now[0])
+    backend = LRUBackend()
+    backend.set("a", b"1", 60)
+
+    now[0] += 59
+    assert backend.get("a") == b"1"
+    now[0] += 2
+    assert backend.get("a") is None
+    assert "a" not in backend.entries
+
+
+def test_bump_changes_only_that_namespace():
+    for backend in (LRUBackend(), RedisBackend(FakeRedis())):
+        backend.bump("courses")
+        backend.bump("courses")
+        assert backend.get_generations(["courses", "bits"]) == [2, 0]
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from backend.app import create_app
+    from backend.config import Config
+    from backend.db import db
+    from backend.routes.rec_worker import recommendation_worker
+    from backend.routes.response_cache import response_cache
+
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", TEST_DATABASE_URL)
+    app = create_app()
+    app.config.update(TESTING=True,
+                      REC_SNAPSHOT_PATH=str(tmp_path / "snapshot.npz"),
+                      NEIGHBOURS_PATH=str(tmp_path / "neighbours.npz"))
+    # Reads may enqueue refreshes; the pipeline itself is not under test
+    monkeypatch.setattr(recommendation_worker, "ensure_started", lambda app: None)
+    monkeypatch.setattr(recommendation_worker, "request_refresh", lambda user_id: None)
+    response_cache.use(LRUBackend())
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    response_cache.use(None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def catalog(app):
+    from backend.db import db
+    from backend.models.course import Course
+    from backend.models.user import User
+
+    user = User(email="ada@example.com", username="ada", major="COMP_SCI")
+    courses = [Course(number=f"COMP_SCI {n}", name=f"Course {n}") for n in (211, 213, 214)]
+    db.session.add(user)
+    db.session.add_all(courses)
+    db.session.commit()
+    return user, courses
+
+
+def _write_recommendations(user, courses, computed_at=None):
+    """Stand-in for a worker (possibly in another process) writing fresh rows."""
+    from backend.db import db
+    from backend.models.recommendation import Recommendation
+    from backend.routes.rec_worker import compute_catalog_version
+
+    Recommendation.query.filter_by(user_id=user.id).delete()
+    for position, course in enumerate(courses):
+        db.session.add(Recommendation(user_id=user.id, rank=position, course_id=course.id,
+                                      model_version="test", profile_version=user.profile_version or 0,
+                                      catalog_version=compute_catalog_version(),
+                                      computed_at=computed_at or datetime.utcnow()))
+    db.session.commit()
+
+
+@needs_database
+def test_course_write_invalidates_course_reads(client, catalog):
+    from backend.db import db
+
+    _, courses = catalog
+    url = f"/api/courses/by_id/{courses[0].id}"
+    assert client.get(url).get_json()["name"] == "Course 211"
+
+    # Written behind the API's back: the cached response is still served
+    courses[0].name = "Renamed"
+    db.session.commit()
+    assert client.get(url).get_json()["name"] == "Course 211"
+
+    client.post("/api/courses/add-update", json={"number": "COMP_SCI 211", "name": "Updated"})
+    assert client.get(url).get_json()["name"] == "Updated"
+
+
+@needs_database
+def test_save_and_unsave_invalidate_saved_courses(client, catalog):
+    user, courses = catalog
+    url = f"/api/users/{user.id}/saved_courses"
+    assert client.get(url).get_json() == []
+
+    client.post(f"/api/users/{user.id}/save_course", json={"course_id": courses[1].id})
+    assert [c["id"] for c in client.get(url).get_json()] == [courses[1].id]
+
+    client.post(f"/api/users/{user.id}/unsave_course", json={"course_id": courses[1].id})
+    assert client.get(url).get_json() == []
+
+
+@needs_database
+def test_new_bit_invalidates_feed(client, catalog):
+    user, courses = catalog
+    client.post(f"/api/users/{user.id}/save_course", json={"course_id": courses[0].id})
+    url = f"/api/bits/get_bits/{user.id}"
+    assert client.get(url).get_json() == []
+
+    client.post("/api/bits/add", json={"course_id": courses[0].id, "content": "hello", "content_type": "text"})
+    assert [bit["content"] for bit in client.get(url).get_json()] == ["hello"]
+
+
+@needs_database
+def test_hits_replay_etag_and_headers(client, catalog):
+    user, courses = catalog
+    client.post(f"/api/users/{user.id}/save_course", json={"course_id": courses[0].id})
+    for content in ("first", "second"):
+        client.post("/api/bits/add", json={"course_id": courses[0].id, "content": content, "content_type": "text"})
+
+    url = f"/api/bits/get_bits/{user.id}?limit=1"
+    miss = client.get(url)
+    hit = client.get(url)
+    assert hit.get_data() == miss.get_data()
+    assert hit.headers["X-Next-Cursor"] == miss.headers["X-Next-Cursor"]
+    assert hit.headers["ETag"]
+
+    conditional = client.get(url, headers={"If-None-Match": hit.headers["ETag"]})
+    assert conditional.status_code == 304
+    assert conditional.get_data() == b""
+
+
+@needs_database
+def test_stale_recommendations_are_not_cached(client, catalog):
+    from backend.routes.response_cache import response_cache
+
+    user, courses = catalog
+    backend = response_cache.backend()
+    url = f"/api/users/get_recommended_courses/{user.id}"
+
+    assert client.get(url).get_json()["stale"] is True
+    assert len(backend.entries) == 0
+
+    _write_recommendations(user, courses[:2])
+    body = client.get(url).get_json()
+    assert body["stale"] is False
+    assert [c["id"] for c in body["courses"]] == [courses[0].id, courses[1].id]
+    assert len(backend.entries) == 1
+
+
+@needs_database
+def test_recommendations_follow_rows_written_elsewhere(client, catalog):
+    user, courses = catalog
+    url = f"/api/users/get_recommended_courses/{user.id}"
+    computed_at = datetime.utcnow()
+    _write_recommendations(user, courses[:2], computed_at)
+    assert [c["id"] for c in client.get(url).get_json()["courses"]] == [courses[0].id, courses[1].id]
+
+    # No generation bump reaches this process's LRU, but the rows' version moved
+    _write_recommendations(user, courses[1:], computed_at + timedelta(seconds=1))
+    assert [c["id"] for c in client.get(url).get_json()["courses"]] == [courses[1].id, courses[2].id]
+
+
+@needs_database
+def test_redis_backend_through_use(client, catalog):
+    from backend.routes.response_cache import response_cache
+
+    redis = FakeRedis()
+    response_cache.use(RedisBackend(redis))
+    user, courses = catalog
+    url = f"/api/users/{user.id}/saved_courses"
+
+    assert client.get(url).get_json() == []
+    assert any(key.startswith("resp:") for key in redis.store)
+
+    client.post(f"/api/users/{user.id}/save_course", json={"course_id": courses[2].id})
+    assert redis.store[f"gen:user:{user.id}:saved"] == 1
+    assert [c["id"] for c in client.get(url).get_json()] == [courses[2].id]
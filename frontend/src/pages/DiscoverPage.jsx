@@ -12,33 +12,51 @@ const DiscoverPage = () => {
   const isScrollingRef = useRef(false);
 
   const userId = 1; // change this dynamically later if needed
+  const PREFETCH_AHEAD = 3; // load the next page when this close to the end
+
+  // Cursor of the next feed page (null once the feed is exhausted)
+  const nextCursor = useRef(undefined);
+  const loadingRef = useRef(false);
+
+  const fetchFeed = async () => {
+    if (loadingRef.current || nextCursor.current === null) return;
+    loadingRef.current = true;
+    try {
+      const params = nextCursor.current ? { after: nextCursor.current } : {};
+      const response = await axios.get(`/get_bits/${userId}`, { params });
+      const data = response.data;
+      nextCursor.current = response.headers['x-next-cursor'] || null;
+
+      // Optional: convert into expected format
+      const formatted = data.map((bit) => ({
+        id: bit.id,
+        title: bit.content_type || 'Course Content',
+        description: bit.content,
+        videoUrl: bit.media || '',
+        thumbnail: '', // add if available in your API
+        likes: bit.likes ?? 0,
+        author: 'Course Team', // placeholder if not returned
+      }));
+
+      setFeed((previous) => [...previous, ...formatted]);
+    } catch (error) {
+      console.error("Error fetching bits:", error);
+    } finally {
+      loadingRef.current = false;
+    }
+  };
 
   useEffect(() => {
-    const fetchFeed = async () => {
-      try {
-        const response = await axios.get(`/get_bits/${userId}`);
-        const data = response.data;
-
-        // Optional: convert into expected format
-        const formatted = data.map((bit) => ({
-          id: bit.id,
-          title: bit.content_type || 'Course Content',
-          description: bit.content,
-          videoUrl: bit.media || '',
-          thumbnail: '', // add if available in your API
-          likes: 0, // placeholder if not returned
-          author: 'Course Team', // placeholder if not returned
-        }));
-
-        setFeed(formatted);
-      } catch (error) {
-        console.error("Error fetching bits:", error);
-      }
-    };
-
     fetchFeed();
   }, []);
 
+  // The feed is paginated; fetch the next page before the user reaches the end
+  useEffect(() => {
+    if (feed.length && currentIndex >= feed.length - PREFETCH_AHEAD) {
+      fetchFeed();
+    }
+  }, [currentIndex, feed.length]);
+
   const handleScroll = (e) => {
     if (isScrollingRef.current) return;
 
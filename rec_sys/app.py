@@ -1,19 +1,84 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
+import threading
 import json
 import numpy as np
-from course_recommender import CourseRecommender
+from .course_recommender import CourseRecommender
+from .facets import FACET_PARAMS
+from .neighbours import NeighbourTable
+from .result_cache import default_result_cache
+from .tiers import recommend_within_budget, DEFAULT_BUDGET_MS
+from .index_builder import ActiveIndex, IndexBuilder
+from .reembed import ReembedMigration
 
 app = Flask(__name__)
 CORS(app)
 
 # Initialize the recommender system
 openai_api_key = os.environ.get('OPENAI_API_KEY')
-recommender = CourseRecommender(openai_api_key)
 
-# Dictionary to store user embeddings
+# Optional PCA reduction of the course matrices, e.g. REDUCTION_DIMS=256
+REDUCTION_DIMS = int(os.environ.get('REDUCTION_DIMS', 0)) or None
+
+# Dictionary to store user embeddings, the embedding model each came from
+# and the profile_version it was computed for (None when unknown)
 user_embeddings = {}
+user_embedding_models = {}
+user_embedding_versions = {}
+
+# Upper bound on queries per /api/query/recommend/batch call
+MAX_BATCH_QUERIES = 100
+
+# Precomputed "similar courses" lists, served by the backend from this file
+NEIGHBOURS_PATH = os.environ.get('NEIGHBOURS_PATH', 'neighbours.npz')
+neighbour_table = NeighbourTable.load(NEIGHBOURS_PATH) if os.path.exists(NEIGHBOURS_PATH) else None
+
+# Catalog + embedding snapshot, also read by the backend for stored course vectors
+SNAPSHOT_PATH = os.environ.get('REC_SNAPSHOT_PATH', 'recommender_snapshot.npz')
+
+# The serving index. Requests read this reference once; reloads build a new
+# index in the background and replace it in a single assignment.
+active = ActiveIndex(CourseRecommender(openai_api_key, reduction_dims=REDUCTION_DIMS), neighbour_table)
+builder = IndexBuilder()
+migration = ReembedMigration()
+# Serialises snapshot/neighbour file writes so an older index never overwrites a newer one
+persist_lock = threading.Lock()
+
+def _store_user_embedding(user_id, embedding, model, profile_version=None):
+    user_embeddings[user_id] = embedding.tolist()  # Convert to list for JSON serialization
+    user_embedding_models[user_id] = model
+    user_embedding_versions[user_id] = profile_version
+
+def _user_embedding(user_id, recommender):
+    # Vectors from another embedding model can't be scored against this index
+    if user_id not in user_embeddings or user_embedding_models.get(user_id) != recommender.embedding_model:
+        return None
+    return np.array(user_embeddings[user_id])
+
+def _persist_embedding_cache(force=False):
+    # Only when EMBEDDING_CACHE_PATH is configured; otherwise at most once per SAVE_INTERVAL
+    recommender = active.recommender
+    if recommender.embedding_cache is not None:
+        recommender.embedding_cache.save_if_due(force=force)
+
+def _swap(index):
+    global active
+    with persist_lock:
+        index.neighbour_table.save(NEIGHBOURS_PATH)
+        index.recommender.save_snapshot(SNAPSHOT_PATH)
+        active = index
+    default_result_cache.invalidate_catalog()
+    _persist_embedding_cache(force=True)
+
+def _persist_if_current(index):
+    # A newer index has its own writes coming; skip stale ones
+    with persist_lock:
+        if active is not index:
+            return
+        if index.neighbour_table is not None:
+            index.neighbour_table.save(NEIGHBOURS_PATH)
+        index.recommender.save_snapshot(SNAPSHOT_PATH)
 
 # Load course data (in production, this would come from a database)
 @app.route('/api/load-courses', methods=['POST'])
@@ -25,39 +90,75 @@ def load_courses():
         content_weight = data.get('content_weight', 0.7)
         experience_weight = data.get('experience_weight', 0.3)
         
-        # Load courses into recommender
-        recommender.load_courses(courses, content_weight=content_weight, experience_weight=experience_weight)
+        # Build the new recommender and neighbour lists off to the side
+        def build(progress):
+            recommender = CourseRecommender(openai_api_key, reduction_dims=REDUCTION_DIMS,
+                                             embedding_model=active.recommender.embedding_model)
+            recommender.load_courses(courses, content_weight=content_weight,
+                                     experience_weight=experience_weight, progress=progress)
+            return ActiveIndex(recommender, NeighbourTable.compute(recommender))
+        
+        build_id = builder.start(build, _swap, total=len(courses))
+        if build_id is None:
+            return jsonify({
+                'success': False,
+                'error': 'A catalog build is already in progress',
+                'status': builder.status()
+            }), 409
+        # A shadow built from the old catalog would miss the reload
+        migration.cancel('Catalog reloaded; restart the migration')
         
         return jsonify({
             'success': True,
-            'message': f'Successfully loaded {len(courses)} courses'
-        })
+            'message': f'Loading {len(courses)} courses in the background',
+            'build_id': build_id
+        }), 202
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+# Progress of the current or last catalog build
+@app.route('/api/load-courses/status', methods=['GET'])
+def load_courses_status():
+    return jsonify({
+        'success': True,
+        'active_build_id': active.build_id,
+        'courses': len(active.recommender.courses),
+        **builder.status()
+    })
+
 # User onboarding API endpoint
 @app.route('/api/user/onboard', methods=['POST'])
 def onboard_user():
+    recommender = active.recommender
     try:
         # Get data from request
         data = request.json
         user_id = data.get('user_id')
         interests = data.get('interests')
+        user = data.get('user')
+        mode = data.get('mode', 'interests')
         
-        if not user_id or not interests:
+        if not user_id or not (interests or (mode == 'compose' and user)):
             return jsonify({
                 'success': False,
                 'error': 'Missing user_id or interests'
             }), 400
         
-        # Generate user embedding from interests
-        embedding = recommender.onboard_user(interests)
+        if mode == 'compose':
+            # LLM-free: top classes + goal text + radar prior
+            embedding = recommender.compose_user_embedding(user)
+        else:
+            # Generate user embedding from interests
+            embedding = recommender.onboard_user(interests)
+        
+        _persist_embedding_cache()
         
         # Store the embedding for future use
-        user_embeddings[user_id] = embedding.tolist()  # Convert to list for JSON serialization
+        _store_user_embedding(user_id, embedding, recommender.embedding_model)
+        default_result_cache.invalidate_user(user_id)
         
         return jsonify({
             'success': True,
@@ -73,12 +174,15 @@ def onboard_user():
 # Get personalized recommendations API endpoint
 @app.route('/api/user/recommend', methods=['POST'])
 def user_recommend():
+    recommender = active.recommender
     try:
         # Get data from request
         data = request.json
         user_id = data.get('user_id')
         filters = data.get('filters')
         top_n = data.get('top_n', 5)
+        user = data.get('user')
+        budget_ms = data.get('budget_ms', DEFAULT_BUDGET_MS)
         
         if not user_id:
             return jsonify({
@@ -86,26 +190,48 @@ def user_recommend():
                 'error': 'Missing user_id'
             }), 400
         
+        # With a profile, serve within the latency budget from the best tier that fits
+        if user:
+            user = dict(user, user_id=user_id)
+            recommendations, tier = recommend_within_budget(
+                recommender,
+                user,
+                budget_ms=budget_ms,
+                cached_embedding=_user_embedding(user_id, recommender),
+                cached_version=user_embedding_versions.get(user_id),
+                on_embedding=lambda embedding: _store_user_embedding(
+                    user_id, embedding, recommender.embedding_model, user.get('profile_version')),
+                filters=filters,
+                top_n=top_n
+            )
+            return jsonify({
+                'success': True,
+                'recommendations': recommendations,
+                'tier': tier
+            })
+        
+        # Get user embedding
+        user_embedding = _user_embedding(user_id, recommender)
+        
         # Check if user embedding exists
-        if user_id not in user_embeddings:
+        if user_embedding is None:
             return jsonify({
                 'success': False,
                 'error': 'User not found or not onboarded'
             }), 404
         
-        # Get user embedding
-        user_embedding = np.array(user_embeddings[user_id])
-        
         # Get recommendations
         recommendations = recommender.recommend_for_user(
             user_embedding, 
             filters=filters, 
-            top_n=top_n
+            top_n=top_n,
+            cache_tag=user_id
         )
         
         return jsonify({
             'success': True,
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            'tier': 'cached_vector'
         })
     except Exception as e:
         return jsonify({
@@ -116,6 +242,7 @@ def user_recommend():
 # Query-based recommendations API endpoint (for direct queries without user profiling)
 @app.route('/api/query/recommend', methods=['POST'])
 def query_recommend():
+    recommender = active.recommender
     try:
         # Get data from request
         data = request.json
@@ -124,6 +251,7 @@ def query_recommend():
         experience_weight = data.get('experience_weight', 0.3)
         filters = data.get('filters')
         top_n = data.get('top_n', 5)
+        mode = data.get('mode', 'auto')
         
         if not query:
             return jsonify({
@@ -137,7 +265,8 @@ def query_recommend():
             content_weight=content_weight, 
             experience_weight=experience_weight,
             filters=filters, 
-            top_n=top_n
+            top_n=top_n,
+            mode=mode
         )
         
         return jsonify({
@@ -150,30 +279,218 @@ def query_recommend():
             'error': str(e)
         }), 500
 
+# Batch variant of query recommendations: one embeddings call for all queries
+@app.route('/api/query/recommend/batch', methods=['POST'])
+def query_recommend_batch():
+    recommender = active.recommender
+    try:
+        # Get data from request
+        data = request.json
+        queries = data.get('queries') or []
+        content_weight = data.get('content_weight', 0.7)
+        experience_weight = data.get('experience_weight', 0.3)
+        filters = data.get('filters')
+        top_n = data.get('top_n', 5)
+        mode = data.get('mode', 'auto')
+        
+        if not queries or any(not (q.get('query') if isinstance(q, dict) else q) for q in queries):
+            return jsonify({
+                'success': False,
+                'error': 'Missing queries'
+            }), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_QUERIES} queries per batch'
+            }), 400
+        
+        results = recommender.recommend_batch(
+            queries,
+            content_weight=content_weight,
+            experience_weight=experience_weight,
+            filters=filters,
+            top_n=top_n,
+            mode=mode
+        )
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {'query': q.get('query') if isinstance(q, dict) else q, 'recommendations': recommendations}
+                for q, recommendations in zip(queries, results)
+            ]
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Insert or update a single course without reloading the catalog
+@app.route('/api/courses/upsert', methods=['POST'])
+def upsert_course():
+    global active
+    try:
+        data = request.json
+        course = data.get('course')
+        
+        if not course or not (course.get('number') or course.get('course_number')):
+            return jsonify({
+                'success': False,
+                'error': 'Missing course or course number'
+            }), 400
+        
+        # Embedding calls happen before any lock is taken
+        serving = active.recommender
+        embeddings = serving.embed_course(course)
+        migration.prepare_upsert(course)
+        
+        # Apply to a copy of the serving index and publish it with one
+        # reference swap; queue for replay if a rebuild is running
+        with builder.lock:
+            index = active
+            recommender = index.recommender.copy()
+            # A cutover since embedding means another model; embed again
+            same_model = recommender.embedding_model == serving.embedding_model
+            course_id = recommender.upsert_course(course, embeddings if same_model else None)
+            
+            # Refresh only the neighbour lists the changed course can affect
+            neighbour_table = index.neighbour_table
+            if neighbour_table is not None:
+                neighbour_table = neighbour_table.copy()
+                neighbour_table.refresh(recommender, course_id)
+            
+            builder.record_upsert(course)
+            with migration.lock:
+                migration.record_upsert(course)
+            published = ActiveIndex(recommender, neighbour_table, index.build_id)
+            active = published
+        default_result_cache.invalidate_catalog()
+        _persist_if_current(published)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Course upserted',
+            'course_index': course_id
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Start re-embedding the catalog with a new model into a shadow index
+@app.route('/api/embeddings/migrate', methods=['POST'])
+def start_embedding_migration():
+    try:
+        data = request.json
+        model = data.get('model')
+        rate = data.get('rate')
+        
+        if not model:
+            return jsonify({
+                'success': False,
+                'error': 'Missing model'
+            }), 400
+        
+        if not migration.start(active, model, rate=rate):
+            return jsonify({
+                'success': False,
+                'error': 'A migration is already running',
+                'status': migration.status()
+            }), 409
+        
+        return jsonify({
+            'success': True,
+            'message': f'Re-embedding {len(active.recommender.courses)} courses with {model}'
+        }), 202
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Progress of the current or last migration
+@app.route('/api/embeddings/migrate/status', methods=['GET'])
+def embedding_migration_status():
+    return jsonify({
+        'success': True,
+        'active_model': active.recommender.embedding_model,
+        **migration.status()
+    })
+
+# Rank sample queries against both the active and the shadow index
+@app.route('/api/embeddings/migrate/compare', methods=['POST'])
+def compare_embedding_migration():
+    try:
+        data = request.json
+        queries = data.get('queries') or []
+        top_n = data.get('top_n', 10)
+        
+        if not queries:
+            return jsonify({
+                'success': False,
+                'error': 'Missing queries'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            **migration.compare(active, queries, top_n=top_n)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Switch serving to the finished shadow index
+@app.route('/api/embeddings/migrate/cutover', methods=['POST'])
+def cutover_embedding_migration():
+    try:
+        with builder.lock, migration.lock:
+            if builder.building():
+                return jsonify({
+                    'success': False,
+                    'error': 'A catalog build is in progress'
+                }), 409
+            _swap(migration.cutover())
+        
+        return jsonify({
+            'success': True,
+            'message': f'Now serving {active.recommender.embedding_model}'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # Get available filter options API endpoint
 @app.route('/api/filter-options', methods=['GET'])
 def get_filter_options():
+    recommender = active.recommender
     try:
-        # Extract unique values for potential filters
-        class_codes = set()
-        professors = set()
-        
-        for course in recommender.courses:
-            # Extract class code from course_name (assuming format like "CS101: ...")
-            if ':' in course['course_name']:
-                code = course['course_name'].split(':')[0].strip()
-                class_codes.add(code)
-            
-            # Extract professor from course_name (assuming format like "... - Prof. Smith")
-            if ' - Prof. ' in course['course_name']:
-                prof = course['course_name'].split(' - Prof. ')[1].strip()
-                professors.add(prof)
+        # Active drill-down selections, e.g. ?department=MATH&professor=Smith
+        filters = {}
+        for facet, param in FACET_PARAMS.items():
+            selected = request.args.getlist(param)
+            if selected:
+                filters[facet] = selected
         
-        return jsonify({
+        facets = recommender.facets
+        etag = facets.etag(filters)
+        if request.if_none_match.contains(etag):
+            return '', 304, {'ETag': f'"{etag}"'}
+        
+        counts = facets.counts(filters)
+        response = jsonify({
             'success': True,
-            'classCodes': sorted(list(class_codes)),
-            'professors': sorted(list(professors))
+            'classCodes': sorted(counts['classCodes']),
+            'professors': sorted(counts['professors']),
+            'counts': counts
         })
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
@@ -185,5 +502,8 @@ if __name__ == '__main__':
     with open('sample_courses.json', 'r') as f:
         sample_courses = json.load(f)
     
-    recommender.load_courses(sample_courses)
+    active.recommender.load_courses(sample_courses)
+    if active.neighbour_table is None:
+        active.neighbour_table = NeighbourTable.compute(active.recommender)
+        active.neighbour_table.save(NEIGHBOURS_PATH)
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import string
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from .course_recommender import CourseRecommender
+from .digraph import build_course_graph
+from .filter import filter_taken
+from .neighbours import RADAR_KEYS
+from .run_recommender import re_rank
+
+
+# Configurations
+SIZES = (1000, 10000, 100000)
+DIMS = 1536
+RUNS = 50
+LOAD_RUNS = 3
+DEPARTMENTS = 200
+PAST_CLASSES = 10
+MAX_PREREQUISITES = 3
+RERANK_DEPTH = 50  # candidates handed to re_rank, as merge() does with its top picks
+TOP_N = 10
+REGRESSION_THRESHOLD = 0.10
+SEED = 7
+
+STAGES = ("load", "filter", "score", "top_k", "re_rank", "filter_taken", "recommend_for_user")
+
+
+def _department_code(i):
+    letters = string.ascii_uppercase
+    return letters[i // 26 % 26] + letters[i % 26] + ("X" * (i // 676))
+
+
+def synthetic_catalog(n, dims=DIMS, departments=DEPARTMENTS, seed=SEED):
+    """
+    Generate n courses with numbers, radar data and a prerequisite DAG,
+    plus content and experience embeddings.
+
+    Course numbers look like "AB 214-3": departments are letter codes,
+    numbers cycle through the 100-499 levels and the sequence suffix keeps
+    them unique. Prerequisites always point at lower-level courses of the
+    same department, so the graph is acyclic.
+
+    Returns:
+        tuple: (courses, content_embeddings, experience_embeddings)
+    """
+    rng = np.random.default_rng(seed)
+    codes = [_department_code(i) for i in range(departments)]
+    radar = rng.uniform(0, 5, size=(n, len(RADAR_KEYS))).round(2)
+
+    courses = []
+    by_department = {code: [] for code in codes}
+    for i in range(n):
+        code = codes[i % departments]
+        slot = i // departments
+        level = 100 + slot % 400
+        number = f"{code} {level}-{slot // 400 + 1}"
+
+        earlier = [p for p in by_department[code][-40:] if p[1] < level]
+        picks = rng.choice(len(earlier), size=min(len(earlier), int(rng.integers(0, MAX_PREREQUISITES + 1))),
+                           replace=False) if earlier else []
+        courses.append({
+            "number": number,
+            "course_number": number,
+            "name": f"Synthetic course {i}",
+            "course_name": f"Synthetic course {i}",
+            "professor": f"Professor {int(rng.integers(0, n // 5 + 1))}",
+            "prerequisites": [earlier[p][0] for p in picks],
+            "content_summary": f"content {i}",
+            "experience_summary": f"experience {i}",
+            "radar": dict(zip(RADAR_KEYS, radar[i].tolist())),
+        })
+        by_department[code].append((number, level))
+
+    def embeddings():
+        # Low-rank structure plus noise, so rankings aren't uniform random
+        basis = rng.standard_normal((64, dims), dtype=np.float32)
+        return (rng.standard_normal((n, 64), dtype=np.float32) @ basis +
+                rng.standard_normal((n, dims), dtype=np.float32))
+
+    return courses, embeddings(), embeddings()
+
+
+def synthetic_user(courses, seed=SEED):
+    rng = np.random.default_rng(seed + 1)
+    past = rng.choice(len(courses), size=min(PAST_CLASSES, len(courses)), replace=False)
+    return {
+        "user_id": "benchmark",
+        "major": courses[int(past[0])]["number"].split(" ")[0],
+        "past_classes": [courses[int(i)]["number"] for i in past],
+        "top_classes": [courses[int(i)]["number"] for i in past[:3]],
+        "goal_description": "",
+        "radar": dict(zip(RADAR_KEYS, rng.uniform(0, 5, len(RADAR_KEYS)).round(2).tolist())),
+    }
+
+
+def time_stage(fn, runs):
+    """Time fn() `runs` times, then once more under tracemalloc for its peak allocation."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = np.array(samples)
+    return {
+        "runs": runs,
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "mean_ms": float(samples.mean()),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run_size(n, dims=DIMS, runs=RUNS, load_runs=LOAD_RUNS, stages=STAGES):
+    """Benchmark every stage on one synthetic catalog of n courses."""
+    courses, content, experience = synthetic_catalog(n, dims=dims)
+    user = synthetic_user(courses)
+    graph = build_course_graph(courses)
+    rng = np.random.default_rng(SEED + 2)
+    query = rng.standard_normal((1, dims), dtype=np.float32)
+
+    # No API key, embedding cache or result cache: every call does the real work
+    recommender = CourseRecommender(None, embedding_cache=None, result_cache=None)
+    recommender.load_embeddings(courses, content, experience)
+    filters = {"major": user["major"], "min_level": 200}
+    similarities = cosine_similarity(query, recommender.scoring_combined)[0]
+    candidates = recommender._rank_dense(similarities, range(len(courses)), None, RERANK_DEPTH)
+
+    work = {
+        "load": (lambda: CourseRecommender(None, embedding_cache=None, result_cache=None)
+                 .load_embeddings(courses, content, experience), load_runs),
+        "filter": (lambda: recommender._apply_filters(filters), runs),
+        "score": (lambda: cosine_similarity(query, recommender.scoring_combined), runs),
+        "top_k": (lambda: recommender._rank_dense(similarities, range(len(courses)), None, TOP_N), runs),
+        "re_rank": (lambda: re_rank(user, candidates), runs),
+        "filter_taken": (lambda: filter_taken(user, courses, graph, index=recommender.index), load_runs),
+        "recommend_for_user": (lambda: recommender.recommend_for_user(query[0], filters=filters, top_n=TOP_N), runs),
+    }
+
+    results = []
+    for stage in stages:
+        fn, stage_runs = work[stage]
+        row = {"size": n, "dims": dims, "stage": stage, **time_stage(fn, stage_runs)}
+        results.append(row)
+        print(f"{n:>9} {stage:>18} p50 {row['p50_ms']:>10.2f} ms  p99 {row['p99_ms']:>10.2f} ms  "
+              f"peak {row['peak_mb']:>8.1f} MB", file=sys.stderr)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES, dims=DIMS, runs=RUNS, load_runs=LOAD_RUNS, stages=STAGES):
+    """
+    Benchmark the recommender on synthetic catalogs of each size.
+
+    Returns:
+        dict: Machine-readable report with the commit, environment and one
+              row per (size, stage) holding p50/p99/mean latency and peak
+              traced memory. Process peak RSS is recorded at the end.
+    """
+    results = []
+    for n in sizes:
+        rows = run_size(n, dims=dims, runs=runs, load_runs=load_runs, stages=stages)
+        results.extend(rows)
+    return {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {"sizes": list(sizes), "dims": dims, "runs": runs, "load_runs": load_runs},
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }
+
+
+def compare(base, head, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare two reports stage by stage on p50 latency.
+
+    Returns:
+        list: Rows with both p50s, the ratio and whether it regressed by more
+              than `threshold`
+    """
+    base_rows = {(r["size"], r["stage"]): r for r in base["results"]}
+    rows = []
+    for r in head["results"]:
+        before = base_rows.get((r["size"], r["stage"]))
+        if before is None:
+            continue
+        ratio = r["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        rows.append({"size": r["size"], "stage": r["stage"], "base_p50_ms": before["p50_ms"],
+                     "head_p50_ms": r["p50_ms"], "ratio": ratio, "regressed": ratio > 1 + threshold})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CourseRecommender on synthetic catalogs; "
+                                                 "needs no API keys.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmark and write a JSON report")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                            help="Catalog sizes; 1M courses needs a small --dims to fit in memory")
+    run_parser.add_argument("--dims", type=int, default=DIMS)
+    run_parser.add_argument("--runs", type=int, default=RUNS)
+    run_parser.add_argument("--load-runs", type=int, default=LOAD_RUNS,
+                            help="Runs for the slow stages (load, filter_taken)")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--output", help="Where to write the report (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports, e.g. from two commits")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                help="Relative p50 slowdown that counts as a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(sizes=args.sizes, dims=args.dims, runs=args.runs, load_runs=args.load_runs,
+                     stages=args.stages)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"✔ Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+        else:
+            print(json.dumps(report, indent=2))
+    else:
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.head, "r", encoding="utf-8") as f:
+            head = json.load(f)
+        rows = compare(base, head, threshold=args.threshold)
+        print(f"{'size':>9} {'stage':>18} {'base ms':>10} {'head ms':>10} {'ratio':>7}")
+        for row in rows:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['size']:>9} {row['stage']:>18} {row['base_p50_ms']:>10.2f} "
+                  f"{row['head_p50_ms']:>10.2f} {row['ratio']:>7.2f}{flag}")
+        sys.exit(1 if any(row["regressed"] for row in rows) else 0)
@@ -0,0 +1,170 @@
+import re
+
+
+# Configurations
+UPPER_LEVEL = 300
+
+COURSE_NUMBER_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z_&]*)[\s_]*(\d+)(?:-(\d+))?")
+
+
+#######################################################################
+# This function parses a course number like "COMP_SCI 214-1" into its #
+# department, numeric level and sequence suffix                       #
+#######################################################################
+
+def parse_course_number(number):
+    """
+    Parse a course number into its parts.
+
+    Args:
+        number (str): Course number such as "MATH 218-1" or "COMP_SCI 214"
+
+    Returns:
+        dict: department (upper-cased), number (int), level (hundreds band)
+              and sequence (int or None). Unparseable numbers only get a
+              department taken from the first whitespace-separated token.
+    """
+    match = COURSE_NUMBER_PATTERN.match(number or "")
+    if not match:
+        department = (number or "").split(" ")[0].upper()
+        return {"department": department, "number": None, "level": None, "sequence": None}
+
+    department, digits, sequence = match.groups()
+    digits = int(digits)
+    return {
+        "department": department.upper(),
+        "number": digits,
+        "level": (digits // 100) * 100,
+        "sequence": int(sequence) if sequence else None,
+    }
+
+
+###################################################################
+# This defines inverted indexes over a course catalog. Course ids #
+# are positions in the catalog list the index was built from.     #
+###################################################################
+
+class CourseIndex:
+    def __init__(self, courses=None):
+        self.by_department = {}
+        self.by_level = {}
+        self.by_number = {}
+        self.aliases = {}
+        self.parsed = []
+        if courses:
+            self.build(courses)
+
+    def build(self, courses):
+        self.by_department = {}
+        self.by_level = {}
+        self.by_number = {}
+        self.aliases = {}
+        self.parsed = []
+        for course_id, course in enumerate(courses):
+            self.add(course_id, course)
+
+    def add(self, course_id, course):
+        """Index a single course under `course_id`, replacing any previous entry."""
+        while len(self.parsed) <= course_id:
+            self.parsed.append(None)
+        if self.parsed[course_id] is not None:
+            self.remove(course_id)
+
+        number = course.get("number") or course.get("course_number", "")
+        parsed = parse_course_number(number)
+        parsed["canonical"] = number
+        parsed["aliases"] = list(course.get("cross_listed") or [])
+        self.parsed[course_id] = parsed
+
+        self.by_number[number] = course_id
+        self._post(self.by_department, parsed["department"], course_id)
+        self._post(self.by_level, parsed["level"], course_id)
+
+        # Cross-listed numbers resolve to the same course and make it visible
+        # under the other department as well
+        for alias in parsed["aliases"]:
+            self.aliases[alias] = number
+            self.by_number[alias] = course_id
+            self._post(self.by_department, parse_course_number(alias)["department"], course_id)
+
+    def remove(self, course_id):
+        parsed = self.parsed[course_id] if course_id < len(self.parsed) else None
+        if parsed is None:
+            return
+        self.by_number.pop(parsed["canonical"], None)
+        self._unpost(self.by_department, parsed["department"], course_id)
+        self._unpost(self.by_level, parsed["level"], course_id)
+        for alias in parsed["aliases"]:
+            self.aliases.pop(alias, None)
+            self.by_number.pop(alias, None)
+            self._unpost(self.by_department, parse_course_number(alias)["department"], course_id)
+        self.parsed[course_id] = None
+
+    def _post(self, postings, key, course_id):
+        if key is not None:
+            postings.setdefault(key, set()).add(course_id)
+
+    def _unpost(self, postings, key, course_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(course_id)
+            if not ids:
+                del postings[key]
+
+    def lookup(self, number):
+        """Return the course id for a course number or cross-listed alias."""
+        return self.by_number.get(number)
+
+    def department(self, major):
+        return self.by_department.get((major or "").upper(), set())
+
+    def levels(self, min_level=None, max_level=None):
+        """Return ids of courses whose level band lies within [min_level, max_level]."""
+        ids = set()
+        for level, level_ids in self.by_level.items():
+            if min_level is not None and level < min_level:
+                continue
+            if max_level is not None and level > max_level:
+                continue
+            ids |= level_ids
+        return ids
+
+    def upper_level(self):
+        return self.levels(min_level=UPPER_LEVEL)
+
+    def select(self, filters, universe=None):
+        """
+        Resolve a filters dict to a set of course ids.
+
+        Args:
+            filters (dict): Any of "major"/"department" (str or list),
+                            "level" (int), "min_level", "max_level" and
+                            "upper_level" (bool)
+            universe (set): Ids to restrict the result to (defaults to all)
+
+        Returns:
+            set: Matching course ids
+        """
+        ids = set(universe) if universe is not None else {
+            i for i, parsed in enumerate(self.parsed) if parsed is not None
+        }
+
+        majors = filters.get("major") or filters.get("department")
+        if majors:
+            if isinstance(majors, str):
+                majors = [majors]
+            matched = set()
+            for major in majors:
+                matched |= self.department(major)
+            ids &= matched
+
+        if filters.get("level") is not None:
+            ids &= self.by_level.get(int(filters["level"]), set())
+
+        if filters.get("min_level") is not None or filters.get("max_level") is not None:
+            ids &= self.levels(filters.get("min_level"), filters.get("max_level"))
+
+        if filters.get("upper_level"):
+            ids &= self.upper_level()
+
+        return ids
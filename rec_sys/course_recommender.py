@@ -1,12 +1,51 @@
+import copy
+import os
+import uuid
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import json
 import openai
+from .course_index import CourseIndex
+from .facets import FacetIndex
+from .lexical import BM25Index, is_keyword_query, reciprocal_rank_fusion
+from .embedding_cache import default_cache
+from .neighbours import radar_vector, RADAR_KEYS
+from .result_cache import default_result_cache, fingerprint
+from .reduction import Reducer
 
 # Configurations
 CONTENT_WEIGHT = 0.7
 EXPERIENCE_WEIGHT = 0.3
 TOP_N = 5
+RRF_DEPTH = 10  # ranking depth (multiple of top_n) fed into rank fusion
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-ada-002")
+LEGACY_EMBEDDING_MODEL = "text-embedding-ada-002"  # assumed for snapshots that predate model tracking
+REDUCTION_DIMS = None  # e.g. 256 to score in a PCA-reduced space
+REDUCTION_METHOD = "pca"
+
+# Blend of the composed (LLM-free) user vector
+GOAL_WEIGHT = 0.5
+TOP_CLASSES_WEIGHT = 0.35
+RADAR_PRIOR_WEIGHT = 0.15
+
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _append_row(matrix, row):
+    row = np.asarray(row).reshape(1, -1)
+    if len(matrix) == 0:
+        return row
+    return np.vstack([matrix, row])
+
+
+def _replace_row(matrix, position, row):
+    # A new array, so readers holding the old one never see a partial write
+    matrix = np.array(matrix, copy=True)
+    matrix[position] = row
+    return matrix
 
 
 ##############################################
@@ -14,17 +53,38 @@ TOP_N = 5
 ##############################################
 
 class CourseRecommender:
-    def __init__(self, api_key):
+    def __init__(self, api_key, embedding_cache=default_cache, result_cache=default_result_cache,
+                 reduction_dims=REDUCTION_DIMS, reduction_method=REDUCTION_METHOD, embedding_model=EMBEDDING_MODEL):
         self.openai_api_key = api_key
+        self.embedding_model = embedding_model
+        self.embedding_cache = embedding_cache
+        self.result_cache = result_cache
+        self.catalog_version = uuid.uuid4().hex
         openai.api_key = self.openai_api_key
         self.courses = []
         self.content_embeddings = []
         self.experience_embeddings = []
         self.combined_embeddings = []
+        self.embedding_models = []
+        self.index = CourseIndex()
+        self.facets = FacetIndex()
+        self.lexical = BM25Index()
+        self.content_weight = CONTENT_WEIGHT
+        self.experience_weight = EXPERIENCE_WEIGHT
+        self.reduction_dims = reduction_dims
+        self.reduction_method = reduction_method
+        self.reducer = None
+        self.scoring_content = []
+        self.scoring_experience = []
+        self.scoring_combined = []
         
-    def load_courses(self, courses_json, content_weight=0.7, experience_weight=0.3):
+    def load_courses(self, courses_json, content_weight=0.7, experience_weight=0.3, progress=None):
 
-        self.courses = json.loads(courses_json) if isinstance(courses_json, str) else courses_json
+        courses = json.loads(courses_json) if isinstance(courses_json, str) else courses_json
+        self.courses = list(courses)
+        self.content_weight = content_weight
+        self.experience_weight = experience_weight
+        self._build_indexes()
         
         # Clear existing embeddings
         self.content_embeddings = []
@@ -32,7 +92,7 @@ class CourseRecommender:
         self.combined_embeddings = []
         
         # Generate embeddings for all courses
-        for course in self.courses:
+        for position, course in enumerate(self.courses):
             content_embedding = self._get_embedding(course['content_summary'])
             experience_embedding = self._get_embedding(course['experience_summary'])
             
@@ -43,20 +103,218 @@ class CourseRecommender:
             combined = np.array(content_embedding) * content_weight + np.array(experience_embedding) * experience_weight
             self.combined_embeddings.append(combined)
             
+            if progress is not None:
+                progress(position + 1, len(self.courses))
+            
         # Convert to numpy arrays for efficient computation
         self.content_embeddings = np.array(self.content_embeddings)
         self.experience_embeddings = np.array(self.experience_embeddings)
         self.combined_embeddings = np.array(self.combined_embeddings)
+        self.embedding_models = [self.embedding_model] * len(self.courses)
+        self._fit_reduction()
         
         # print(f"Loaded {len(self.courses)} courses with embeddings")
     
+    def load_embeddings(self, courses, content_embeddings, experience_embeddings,
+                        content_weight=CONTENT_WEIGHT, experience_weight=EXPERIENCE_WEIGHT, reducer=None,
+                        embedding_models=None):
+        """Load courses with precomputed embeddings, making no embedding calls."""
+        self.courses = list(courses)
+        self.content_weight = content_weight
+        self.experience_weight = experience_weight
+        self._build_indexes()
+        
+        self.content_embeddings = np.asarray(content_embeddings)
+        self.experience_embeddings = np.asarray(experience_embeddings)
+        self.combined_embeddings = (self.content_embeddings * content_weight +
+                                    self.experience_embeddings * experience_weight)
+        self.embedding_models = list(embedding_models or [self.embedding_model] * len(self.courses))
+        self._fit_reduction(reducer)
+    
+    def _fit_reduction(self, reducer=None):
+        """Fit (or install) the optional reduction and project the course matrices with it."""
+        self.reducer = reducer
+        if reducer is None and self.reduction_dims and len(self.courses):
+            # One basis for both matrices so content and experience scores stay comparable
+            self.reducer = Reducer.fit(np.vstack([self.content_embeddings, self.experience_embeddings]),
+                                       self.reduction_dims, method=self.reduction_method)
+        self.scoring_content = self._project(self.content_embeddings)
+        self.scoring_experience = self._project(self.experience_embeddings)
+        self.scoring_combined = self._project(self.combined_embeddings)
+    
+    def _project(self, vectors):
+        """Map full-size vectors into the space the course matrices are scored in."""
+        if self.reducer is None or len(vectors) == 0:
+            return vectors
+        return self.reducer.transform(vectors)
+    
+    def _build_indexes(self):
+        self.catalog_version = uuid.uuid4().hex
+        # Parse course numbers once and build the department/level, facet and lexical indexes
+        self.index = CourseIndex(self.courses)
+        self.facets = FacetIndex(self.courses)
+        self.lexical = BM25Index(self.courses)
+    
+    def save_snapshot(self, path):
+        """Write the catalog and its embedding matrices to an .npz snapshot."""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            courses=np.array(json.dumps(self.courses)),
+            content_embeddings=np.asarray(self.content_embeddings, dtype=np.float32),
+            experience_embeddings=np.asarray(self.experience_embeddings, dtype=np.float32),
+            weights=np.array([self.content_weight, self.experience_weight]),
+            embedding_model=np.array(self.embedding_model),
+            embedding_models=np.array(self.embedding_models, dtype=str),
+            **(self.reducer.to_arrays() if self.reducer is not None else {}),
+        )
+        os.replace(tmp_path, path)
+    
+    def load_snapshot(self, path):
+        """Restore a catalog written by save_snapshot without re-embedding it."""
+        with np.load(path) as snapshot:
+            content_weight, experience_weight = snapshot['weights'].tolist()
+            # Queries must be embedded with the model the stored vectors came from
+            self.embedding_model = (str(snapshot['embedding_model']) if 'embedding_model' in snapshot
+                                    else LEGACY_EMBEDDING_MODEL)
+            embedding_models = (snapshot['embedding_models'].tolist() if 'embedding_models' in snapshot
+                                else None)
+            self.load_embeddings(
+                json.loads(str(snapshot['courses'])),
+                snapshot['content_embeddings'],
+                snapshot['experience_embeddings'],
+                content_weight=content_weight,
+                experience_weight=experience_weight,
+                reducer=Reducer.from_arrays(snapshot),
+                embedding_models=embedding_models,
+            )
+    
+    def copy(self):
+        """
+        Copy to apply upserts to while this recommender keeps serving.
+
+        Matrices are shared: upsert_course replaces them rather than writing
+        into them. The catalog list and the indexes, which it does modify,
+        are copied.
+        """
+        clone = copy.copy(self)
+        clone.courses = list(self.courses)
+        clone.embedding_models = list(self.embedding_models)
+        clone.index = copy.deepcopy(self.index)
+        clone.facets = copy.deepcopy(self.facets)
+        clone.lexical = copy.deepcopy(self.lexical)
+        return clone
+    
+    def embed_course(self, course):
+        """(content, experience) vectors for a course record; the API calls of an upsert."""
+        return (np.array(self._get_embedding(course['content_summary'])),
+                np.array(self._get_embedding(course['experience_summary'])))
+    
+    def upsert_course(self, course, embeddings=None):
+        """
+        Insert or replace a single course without re-embedding the catalog.
+        
+        Args:
+            course (dict): Course record with number, content_summary and experience_summary
+            embeddings (tuple): (content, experience) from embed_course, if already computed
+            
+        Returns:
+            int: Position of the course in the catalog
+        """
+        number = course.get('number') or course.get('course_number')
+        content_embedding, experience_embedding = embeddings or self.embed_course(course)
+        combined = content_embedding * self.content_weight + experience_embedding * self.experience_weight
+        
+        course_id = self.index.lookup(number)
+        if course_id is None:
+            course_id = len(self.courses)
+            self.courses.append(course)
+            self.content_embeddings = _append_row(self.content_embeddings, content_embedding)
+            self.experience_embeddings = _append_row(self.experience_embeddings, experience_embedding)
+            self.combined_embeddings = _append_row(self.combined_embeddings, combined)
+            self.embedding_models.append(self.embedding_model)
+        else:
+            self.courses[course_id] = course
+            self.content_embeddings = _replace_row(self.content_embeddings, course_id, content_embedding)
+            self.experience_embeddings = _replace_row(self.experience_embeddings, course_id, experience_embedding)
+            self.combined_embeddings = _replace_row(self.combined_embeddings, course_id, combined)
+            self.embedding_models[course_id] = self.embedding_model
+        
+        if self.reducer is None:
+            self.scoring_content = self.content_embeddings
+            self.scoring_experience = self.experience_embeddings
+            self.scoring_combined = self.combined_embeddings
+        elif course_id == len(self.scoring_combined):
+            # Project the new row with the existing basis; refits happen on reload
+            self.scoring_content = _append_row(self.scoring_content, self._project(content_embedding))
+            self.scoring_experience = _append_row(self.scoring_experience, self._project(experience_embedding))
+            self.scoring_combined = _append_row(self.scoring_combined, self._project(combined))
+        else:
+            self.scoring_content = _replace_row(self.scoring_content, course_id, self._project(content_embedding))
+            self.scoring_experience = _replace_row(self.scoring_experience, course_id,
+                                                   self._project(experience_embedding))
+            self.scoring_combined = _replace_row(self.scoring_combined, course_id, self._project(combined))
+        
+        # Keep the indexes in step with the catalog
+        self.catalog_version = uuid.uuid4().hex
+        self.index.add(course_id, course)
+        self.facets.upsert(course_id, course)
+        self.lexical.upsert(course_id, course)
+        return course_id
+    
+    def stale_embeddings(self, model=None):
+        """Positions of courses whose stored vectors were not made with `model` (default: ours)."""
+        model = model or self.embedding_model
+        return [i for i, row_model in enumerate(self.embedding_models) if row_model != model]
+    
     def _get_embedding(self, text):
-        """Get embedding for text using OpenAI ada-002 model."""
+        """Get embedding for text using the configured OpenAI model, reusing cached vectors."""
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(self.embedding_model, text)
+            if cached is not None:
+                return cached
         response = openai.embeddings.create(
-            model="text-embedding-ada-002",
+            model=self.embedding_model,
             input=text
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(self.embedding_model, text, embedding)
+        return embedding
+    
+    def _get_embeddings(self, texts):
+        """Embed several texts with at most one batched API call; cached texts cost nothing."""
+        embeddings = {}
+        if self.embedding_cache is not None:
+            for text in texts:
+                cached = self.embedding_cache.get(self.embedding_model, text)
+                if cached is not None:
+                    embeddings[text] = cached
+        
+        missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+        if missing:
+            response = openai.embeddings.create(
+                model=self.embedding_model,
+                input=missing
+            )
+            for item in response.data:
+                text = missing[item.index]
+                embeddings[text] = item.embedding
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put(self.embedding_model, text, item.embedding)
+        return [embeddings[text] for text in texts]
+    
+    def _lookup_embedding(self, text, offline=False):
+        """Embedding for text; with offline=True only a cached vector (or None)."""
+        if not offline:
+            return self._get_embedding(text)
+        if self.embedding_cache is None:
+            return None
+        return self.embedding_cache.get(self.embedding_model, text)
+    
+    def _apply_filters(self, filters):
+        """Return the sorted positions of courses matching `filters` (see CourseIndex.select)."""
+        return sorted(self.index.select(filters))
     
     def onboard_user(self, user_interests):
 
@@ -64,7 +322,71 @@ class CourseRecommender:
         user_embedding = self._get_embedding(user_interests)
         return np.array(user_embedding)
     
-    def recommend_for_user(self, user_embedding, filters=None, top_n=TOP_N):
+    def compose_user_embedding(self, user, courses=None, goal_weight=GOAL_WEIGHT,
+                               top_classes_weight=TOP_CLASSES_WEIGHT, radar_weight=RADAR_PRIOR_WEIGHT,
+                               offline=False):
+        """
+        Build a user embedding without an LLM summary.
+        
+        The vector is a weighted blend of (a) the centroid of the user's top
+        classes' combined embeddings, (b) the embedding of goal_description and
+        (c) a radar prior: the catalog centroid weighted by how well each
+        course's radar matches the user's radar preferences. Each part is
+        unit-normalised before blending and missing parts are dropped.
+        
+        Args:
+            user (dict): User record with top_classes, goal_description and radar
+            courses (list): Full catalog used to embed top classes that are not
+                            loaded in this recommender (e.g. already taken)
+            goal_weight (float): Weight of the goal description embedding
+            top_classes_weight (float): Weight of the top classes centroid
+            radar_weight (float): Weight of the radar prior
+            offline (bool): Never call the embeddings API; text without a
+                            cached vector is left out of the blend
+            
+        Returns:
+            np.array: User embedding. Only the goal text (and top classes
+                      whose summaries were never embedded) can cost an
+                      embedding call; cached text costs none.
+        """
+        parts = []
+        
+        # Stored vectors of the user's favourite past classes
+        top_vectors = []
+        for number in user.get("top_classes") or []:
+            course_id = self.index.lookup(number)
+            if course_id is not None:
+                top_vectors.append(self.combined_embeddings[course_id])
+                continue
+            course = next((c for c in courses or [] if c.get("number") == number), None)
+            if course is not None:
+                content = self._lookup_embedding(course['content_summary'], offline)
+                experience = self._lookup_embedding(course['experience_summary'], offline)
+                if content is not None and experience is not None:
+                    top_vectors.append(np.array(content) * self.content_weight +
+                                       np.array(experience) * self.experience_weight)
+        if top_vectors and top_classes_weight > 0:
+            parts.append((top_classes_weight, _unit(np.mean(top_vectors, axis=0))))
+        
+        goal = (user.get("goal_description") or "").strip()
+        goal_embedding = self._lookup_embedding(goal, offline) if goal and goal_weight > 0 else None
+        if goal_embedding is not None:
+            parts.append((goal_weight, _unit(np.array(goal_embedding))))
+        
+        radar = user.get("radar")
+        if radar and len(self.courses) and radar_weight > 0:
+            preferences = np.array([float(radar.get(k) or 0) for k in RADAR_KEYS])
+            affinity = np.array([radar_vector(c) for c in self.courses]) @ preferences
+            weights = np.exp((affinity - affinity.max()) / (affinity.std() or 1))
+            parts.append((radar_weight, _unit(weights @ self.combined_embeddings / weights.sum())))
+        
+        if not parts:
+            raise ValueError("User has no top classes, goal description or radar to compose from")
+        
+        total = sum(weight for weight, _ in parts)
+        return _unit(sum(weight / total * vector for weight, vector in parts))
+    
+    def recommend_for_user(self, user_embedding, filters=None, top_n=TOP_N, cache_tag=None):
         """
         Recommend courses based on user's interest embedding.
         
@@ -72,15 +394,25 @@ class CourseRecommender:
             user_embedding (np.array): User interest embedding from onboarding
             filters (dict): Optional filters to apply to results
             top_n (int): Number of top results to return
+            cache_tag: Optional user id the cached result is filed under, so
+                       ResultCache.invalidate_user can drop it
             
         Returns:
             list: Top N courses matching the user's interests
         """
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = ("recommend_for_user", fingerprint(user_embedding), self.catalog_version,
+                         self.content_weight, self.experience_weight, fingerprint(filters), top_n)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Reshape user embedding for similarity calculation
-        user_embedding = user_embedding.reshape(1, -1)
+        user_embedding = self._project(user_embedding.reshape(1, -1))
         
         # Calculate similarities using the precomputed combined embeddings
-        similarities = cosine_similarity(user_embedding, self.combined_embeddings)[0]
+        similarities = cosine_similarity(user_embedding, self.scoring_combined)[0]
         
         # Apply filters if specified
         filtered_indices = self._apply_filters(filters) if filters else range(len(self.courses))
@@ -94,19 +426,22 @@ class CourseRecommender:
         for idx, score in top_indices:
             # Calculate individual content and experience similarities for reference
             content_similarity = cosine_similarity(
-                user_embedding, self.content_embeddings[idx].reshape(1, -1)
+                user_embedding, self.scoring_content[idx].reshape(1, -1)
             )[0][0]
             
             experience_similarity = cosine_similarity(
-                user_embedding, self.experience_embeddings[idx].reshape(1, -1)
+                user_embedding, self.scoring_experience[idx].reshape(1, -1)
             )[0][0]
             
             recommendations.append(self.courses[idx])
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, recommendations, tag=cache_tag)
             
         return recommendations
     
     def recommend(self, query, content_weight=CONTENT_WEIGHT, experience_weight=EXPERIENCE_WEIGHT, 
-                  filters=None, top_n=TOP_N):
+                  filters=None, top_n=TOP_N, mode="auto"):
         """
         Recommend courses based on query text.
         
@@ -116,32 +451,121 @@ class CourseRecommender:
             experience_weight (float): Weight for experience similarity (default: 0.3)
             filters (dict): Optional filters to apply to results
             top_n (int): Number of top results to return
+            mode (str): "lexical" (BM25 only, no embedding call), "dense"
+                        (embedding similarity only), "hybrid" (reciprocal rank
+                        fusion of both) or "auto" (lexical for keyword queries
+                        with matches, hybrid otherwise)
             
         Returns:
             list: Top N courses matching the query
         """
+        # Apply filters if specified
+        filtered_indices = self._apply_filters(filters) if filters else range(len(self.courses))
+        candidates = set(filtered_indices) if filters else None
+        
+        if mode != "dense":
+            lexical_hits = self.lexical.search(query, top_n=max(top_n * RRF_DEPTH, top_n), candidates=candidates)
+            if mode == "lexical" or (mode == "auto" and lexical_hits and is_keyword_query(query)):
+                return [self.courses[idx] for idx, score in lexical_hits[:top_n]]
+        
         # Generate query embeddings
         query_embedding = self._get_embedding(query)
-        query_embedding = np.array(query_embedding).reshape(1, -1)
+        query_embedding = self._project(np.array(query_embedding).reshape(1, -1))
         
         # Calculate similarities
-        content_similarities = cosine_similarity(query_embedding, self.content_embeddings)[0]
-        experience_similarities = cosine_similarity(query_embedding, self.experience_embeddings)[0]
+        content_similarities = cosine_similarity(query_embedding, self.scoring_content)[0]
+        experience_similarities = cosine_similarity(query_embedding, self.scoring_experience)[0]
         
         # Combine similarities with weights
         weighted_similarities = (content_weight * content_similarities + 
                                experience_weight * experience_similarities)
         
-        # Apply filters if specified
-        filtered_indices = self._apply_filters(filters) if filters else range(len(self.courses))
-        
+        return self._rank_dense(weighted_similarities, filtered_indices,
+                                None if mode == "dense" else lexical_hits, top_n)
+    
+    def _rank_dense(self, weighted_similarities, filtered_indices, lexical_hits, top_n):
+        """Top courses by similarity, fused with the BM25 ranking when there is one."""
         # Get indices of top N results from filtered set
         filtered_similarities = [(i, weighted_similarities[i]) for i in filtered_indices]
-        top_indices = sorted(filtered_similarities, key=lambda x: x[1], reverse=True)[:top_n]
+        top_indices = sorted(filtered_similarities, key=lambda x: x[1], reverse=True)
+        
+        if not lexical_hits:
+            top_indices = top_indices[:top_n]
+        else:
+            # Fuse the dense and BM25 rankings by reciprocal rank
+            dense_ranking = [idx for idx, score in top_indices[:max(top_n * RRF_DEPTH, top_n)]]
+            lexical_ranking = [idx for idx, score in lexical_hits]
+            top_indices = reciprocal_rank_fusion([dense_ranking, lexical_ranking])[:top_n]
         
         # Return top courses with their similarity scores
         recommendations = []
         for idx, score in top_indices:
             recommendations.append(self.courses[idx])
             
-        return recommendations
\ No newline at end of file
+        return recommendations
+    
+    def recommend_batch(self, queries, content_weight=CONTENT_WEIGHT, experience_weight=EXPERIENCE_WEIGHT,
+                        filters=None, top_n=TOP_N, mode="auto"):
+        """
+        Recommend courses for many queries at once.
+        
+        Queries answered by BM25 alone never reach the embeddings API. The
+        rest are embedded in one batched request and scored with a single
+        matrix-matrix product against the unit-normalised, pre-weighted
+        content and experience matrices, which gives the same scores as
+        recommend() for each query.
+        
+        Args:
+            queries (list): Query strings, or dicts with "query" and optional
+                            "filters", "top_n" and "mode" overriding the shared ones
+            content_weight (float): Weight for content similarity (default: 0.7)
+            experience_weight (float): Weight for experience similarity (default: 0.3)
+            filters (dict): Filters shared by queries that don't set their own
+            top_n (int): Default number of results per query
+            mode (str): Default mode, as in recommend()
+            
+        Returns:
+            list: One list of recommended courses per query, in input order
+        """
+        specs = [q if isinstance(q, dict) else {"query": q} for q in queries]
+        results = [None] * len(specs)
+        pending = []
+        
+        for position, spec in enumerate(specs):
+            query = spec["query"]
+            query_filters = spec.get("filters", filters)
+            query_top_n = spec.get("top_n", top_n)
+            query_mode = spec.get("mode", mode)
+            
+            filtered_indices = self._apply_filters(query_filters) if query_filters else range(len(self.courses))
+            candidates = set(filtered_indices) if query_filters else None
+            
+            lexical_hits = None
+            if query_mode != "dense":
+                lexical_hits = self.lexical.search(query, top_n=max(query_top_n * RRF_DEPTH, query_top_n),
+                                                   candidates=candidates)
+                if query_mode == "lexical" or (query_mode == "auto" and lexical_hits and is_keyword_query(query)):
+                    results[position] = [self.courses[idx] for idx, score in lexical_hits[:query_top_n]]
+                    continue
+            pending.append((position, query, filtered_indices, lexical_hits, query_top_n))
+        
+        if pending and len(self.courses):
+            # One embeddings request for every query that needs a vector
+            query_matrix = self._project(np.array(self._get_embeddings([query for _, query, _, _, _ in pending])))
+            query_matrix /= np.linalg.norm(query_matrix, axis=1, keepdims=True).clip(min=1e-12)
+            
+            def normalised(matrix):
+                return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+            
+            # cos(q, c) * wc + cos(q, e) * we == q . (wc * c_hat + we * e_hat)
+            course_matrix = (content_weight * normalised(self.scoring_content) +
+                             experience_weight * normalised(self.scoring_experience))
+            similarities = query_matrix @ course_matrix.T
+            
+            for row, (position, query, filtered_indices, lexical_hits, query_top_n) in enumerate(pending):
+                results[position] = self._rank_dense(similarities[row], filtered_indices, lexical_hits, query_top_n)
+        else:
+            for position, *_ in pending:
+                results[position] = []
+        
+        return results
\ No newline at end of file
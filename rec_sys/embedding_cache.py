@@ -0,0 +1,97 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+# Configurations
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 50000))
+SAVE_INTERVAL = 60  # seconds between rewrites of the .npz file
+
+
+#########################################################################
+# This defines a text -> embedding cache keyed by (model, text digest). #
+# It can be persisted to an .npz file so repeated goal descriptions and #
+# course summaries never pay for a second embeddings round trip. It is  #
+# an LRU capped at max_entries, since free-text queries land here too.  #
+#########################################################################
+
+class EmbeddingCache:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, save_interval=SAVE_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.vectors = OrderedDict()
+        self.dirty = False
+        self.saved_at = 0.0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(model, text):
+        return hashlib.sha1(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model, text):
+        key = self.key(model, text)
+        with self.lock:
+            vector = self.vectors.get(key)
+            if vector is not None:
+                self.vectors.move_to_end(key)
+            return vector
+
+    def put(self, model, text, vector):
+        with self.lock:
+            key = self.key(model, text)
+            self.vectors[key] = np.asarray(vector, dtype=np.float32)
+            self.vectors.move_to_end(key)
+            self._evict()
+            self.dirty = True
+
+    def _evict(self):
+        while len(self.vectors) > self.max_entries:
+            self.vectors.popitem(last=False)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def save(self, path=None):
+        path = path or self.path
+        with self.lock:
+            keys = list(self.vectors)
+            vectors = np.stack([self.vectors[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+            self.dirty = False
+            self.saved_at = time.monotonic()
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys), vectors=vectors)
+        os.replace(tmp_path, path)
+
+    def save_if_due(self, force=False):
+        """
+        Persist new entries at most once per save_interval (or now, with
+        force), so hot paths like onboarding don't rewrite the file per call.
+
+        Returns:
+            bool: Whether the file was written
+        """
+        if not self.path or not self.dirty:
+            return False
+        if not force and time.monotonic() - self.saved_at < self.save_interval:
+            return False
+        self.save()
+        return True
+
+    def load(self, path):
+        with np.load(path) as data:
+            with self.lock:
+                # Stored oldest first, so the LRU order survives a restart
+                self.vectors.update(zip(data["keys"].tolist(), data["vectors"]))
+                self._evict()
+
+
+# Shared by every recommender in the process
+default_cache = EmbeddingCache(os.getenv("EMBEDDING_CACHE_PATH"))
+atexit.register(default_cache.save_if_due, force=True)
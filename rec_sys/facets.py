@@ -0,0 +1,122 @@
+import hashlib
+import json
+import uuid
+from .course_index import parse_course_number
+
+
+# Facet name -> query string parameter used for drill-down filters
+FACET_PARAMS = {
+    "classCodes": "classCode",
+    "professors": "professor",
+    "departments": "department",
+    "levels": "level",
+}
+
+
+#####################################################################
+# This function extracts the facet values of a single course record #
+#####################################################################
+
+def course_facets(course):
+    name = course.get("name") or course.get("course_name") or ""
+
+    # Class code: explicit number, else "CS101: ..." style course names
+    code = course.get("number") or course.get("course_number")
+    if not code and ":" in name:
+        code = name.split(":")[0].strip()
+
+    # Professor: explicit field, else "... - Prof. Smith" style course names
+    professor = course.get("professor")
+    if not professor and " - Prof. " in name:
+        professor = name.split(" - Prof. ")[1].strip()
+
+    values = {"classCodes": code, "professors": professor, "departments": None, "levels": None}
+    if code:
+        parsed = parse_course_number(code)
+        values["departments"] = parsed["department"] or None
+        values["levels"] = str(parsed["level"]) if parsed["level"] is not None else None
+    return values
+
+
+#######################################################################
+# This defines a facet index (value -> course ids) kept up to date as #
+# courses are upserted, so filter options never rescan the catalog    #
+#######################################################################
+
+class FacetIndex:
+    def __init__(self, courses=None):
+        self.postings = {facet: {} for facet in FACET_PARAMS}
+        self.values = []
+        self.build_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        for course_id, course in enumerate(courses or []):
+            self.upsert(course_id, course)
+
+    def upsert(self, course_id, course):
+        """Index `course` under `course_id`, replacing its previous facet values."""
+        self.remove(course_id)
+        while len(self.values) <= course_id:
+            self.values.append(None)
+
+        values = course_facets(course)
+        for facet, value in values.items():
+            if value:
+                self.postings[facet].setdefault(value, set()).add(course_id)
+        self.values[course_id] = values
+        self.version += 1
+
+    def remove(self, course_id):
+        if course_id >= len(self.values) or self.values[course_id] is None:
+            return
+        for facet, value in self.values[course_id].items():
+            ids = self.postings[facet].get(value)
+            if ids is not None:
+                ids.discard(course_id)
+                if not ids:
+                    del self.postings[facet][value]
+        self.values[course_id] = None
+        self.version += 1
+
+    def _matching(self, filters, skip=None):
+        """Ids matching every active filter except the one on facet `skip`."""
+        ids = None
+        for facet, selected in filters.items():
+            if facet == skip or not selected:
+                continue
+            matched = set()
+            for value in selected:
+                matched |= self.postings[facet].get(value, set())
+            ids = matched if ids is None else ids & matched
+        return ids
+
+    def counts(self, filters=None):
+        """
+        Count courses per facet value.
+
+        Args:
+            filters (dict): Facet name -> list of selected values. Each facet's
+                            counts are conditioned on the selections made in
+                            the other facets, as in a drill-down sidebar.
+
+        Returns:
+            dict: Facet name -> {value: count}
+        """
+        filters = filters or {}
+        result = {}
+        for facet, postings in self.postings.items():
+            ids = self._matching(filters, skip=facet)
+            if ids is None:
+                result[facet] = {value: len(value_ids) for value, value_ids in postings.items()}
+            else:
+                result[facet] = {
+                    value: len(value_ids & ids)
+                    for value, value_ids in postings.items()
+                    if value_ids & ids
+                }
+        return result
+
+    def etag(self, filters=None):
+        """Strong (unquoted) ETag for the facet counts under `filters`."""
+        key = json.dumps(filters or {}, sort_keys=True)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return f"{self.build_id}-{self.version}-{digest}"
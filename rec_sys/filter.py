@@ -1,5 +1,4 @@
 import networkx as nx
-from .generate_preferences import get_course
 
 
 
@@ -20,14 +19,25 @@ def remove_node_and_predecessors(G, target_node):
 # This defines a function that filters out all previously taken courses #
 #########################################################################
 
-def filter_taken(user, courses, course_graph):
+def filter_taken(user, courses, course_graph, index):
+    """
+    Courses still open to the user once taken courses and their
+    prerequisites are removed.
+
+    Args:
+        index (CourseIndex): Index built once over `courses`, e.g.
+                             recommender.index; positions refer to `courses`
+    """
     taken_numbers = user['past_classes']
     for t in taken_numbers:
         course_graph = remove_node_and_predecessors(course_graph, t)
     numbers = list(course_graph.nodes)
     allowed = []
     for n in numbers:
-        allowed.append(get_course(n, courses))
+        course_id = index.lookup(n)
+        # Prerequisites that aren't in the catalog are graph nodes too
+        if course_id is not None:
+            allowed.append(courses[course_id])
     # print(numbers)
     return allowed
 
@@ -35,15 +45,16 @@ def filter_taken(user, courses, course_graph):
 # This defines a function that filters out courses by major #
 #############################################################
 
-def filter_major(major, courses):
-    allowed = []
-    for course in courses:
-        course_major = course["number"].split(" ")[0].upper()
-        if course_major == major:
-            allowed.append(course)
-    return allowed
-
-
-
+def filter_major(major, courses, index):
+    """Keep the courses of one department; `index` covers the catalog `courses` were taken from."""
+    allowed_ids = index.department(major)
+    return [course for course in courses if index.lookup(course["number"]) in allowed_ids]
 
+######################################################################
+# This defines a function that keeps only upper-level (300+) courses #
+######################################################################
 
+def filter_upper_level(courses, index):
+    """Keep 300+ level courses; `index` covers the catalog `courses` were taken from."""
+    allowed_ids = index.upper_level()
+    return [course for course in courses if index.lookup(course["number"]) in allowed_ids]
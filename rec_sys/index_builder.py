@@ -0,0 +1,90 @@
+import threading
+import time
+import traceback
+import uuid
+
+
+#########################################################################
+# This defines the serving index: a recommender and its neighbour table #
+# that are always swapped together as one reference.                    #
+#########################################################################
+
+class ActiveIndex:
+    def __init__(self, recommender, neighbour_table=None, build_id=None):
+        self.recommender = recommender
+        self.neighbour_table = neighbour_table
+        self.build_id = build_id
+
+
+###########################################################################
+# This defines a double-buffered index builder. A new index is built in a #
+# background thread while requests keep reading the current one; upserts  #
+# that arrive mid-build are replayed on the new index right before the    #
+# single reference swap, so no write is lost and no reader sees a         #
+# half-built matrix.                                                      #
+###########################################################################
+
+class IndexBuilder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pending_upserts = []
+        self.state = {"status": "idle", "build_id": None, "done": 0, "total": 0,
+                      "started_at": None, "finished_at": None, "error": None}
+
+    def building(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, build, swap, total=0):
+        """
+        Start a background build.
+
+        Args:
+            build (callable): build(progress) -> ActiveIndex; progress(done, total)
+                              reports how far along the build is
+            swap (callable): swap(index) installs the finished index; called
+                             with the builder lock held
+            total (int): Expected number of units of work, for the status
+
+        Returns:
+            str: Build id, or None if a build is already running
+        """
+        with self.lock:
+            if self.building():
+                return None
+            build_id = uuid.uuid4().hex[:12]
+            self.pending_upserts = []
+            self.state = {"status": "building", "build_id": build_id, "done": 0, "total": total,
+                          "started_at": time.time(), "finished_at": None, "error": None}
+            self.thread = threading.Thread(target=self._run, args=(build, swap, build_id),
+                                           name=f"index-build-{build_id}", daemon=True)
+            self.thread.start()
+            return build_id
+
+    def _progress(self, done, total):
+        self.state["done"], self.state["total"] = done, total
+
+    def _run(self, build, swap, build_id):
+        try:
+            index = build(self._progress)
+            index.build_id = build_id
+            with self.lock:
+                # Writes that hit the old index while we were building
+                for course in self.pending_upserts:
+                    course_id = index.recommender.upsert_course(course)
+                    if index.neighbour_table is not None:
+                        index.neighbour_table.refresh(index.recommender, course_id)
+                self.pending_upserts = []
+                swap(index)
+                self.state.update(status="ready", finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self.state.update(status="failed", finished_at=time.time(), error=str(e))
+
+    def record_upsert(self, course):
+        """Queue an upsert for replay if a build is running. Call with self.lock held."""
+        if self.building():
+            self.pending_upserts.append(course)
+
+    def status(self):
+        return dict(self.state)
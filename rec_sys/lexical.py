@@ -0,0 +1,146 @@
+import math
+import re
+from .course_index import COURSE_NUMBER_PATTERN
+
+
+# Configurations
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+KEYWORD_MAX_TOKENS = 3
+
+# Term-frequency multipliers per course field (a simplified BM25F)
+FIELD_WEIGHTS = {
+    "number": 3,
+    "name": 2,
+    "professor": 2,
+    "content_summary": 1,
+    "experience_summary": 1,
+}
+
+STOPWORDS = {"a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "prof", "professor", "dr", "course", "class"}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+#####################################################################
+# This function splits text into lowercase terms. Adjacent letter + #
+# digit tokens are also joined so "CS 214" and "cs214" both match.  #
+#####################################################################
+
+def tokenize(text):
+    tokens = [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+    joined = [a + b for a, b in zip(tokens, tokens[1:]) if a.isalpha() and b.isdigit()]
+    return tokens + joined
+
+
+def course_terms(course):
+    """Return the weighted term frequencies of a course record."""
+    fields = dict(course)
+    fields["number"] = " ".join([course.get("number") or course.get("course_number") or ""] +
+                                list(course.get("cross_listed") or []))
+    fields["name"] = course.get("name") or course.get("course_name")
+
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(fields.get(field)):
+            terms[term] = terms.get(term, 0) + weight
+    return terms
+
+
+def is_keyword_query(query):
+    """True for short or course-number style queries that lexical search answers well."""
+    return bool(COURSE_NUMBER_PATTERN.match(query or "")) or len(tokenize(query)) <= KEYWORD_MAX_TOKENS
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse several rankings into one.
+
+    Args:
+        rankings (list): Lists of ids, each ordered best first
+        k (int): RRF damping constant
+
+    Returns:
+        list: (id, fused score) pairs ordered best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+######################################################################
+# This defines an in-memory BM25 inverted index over course records. #
+# Document ids are positions in the recommender's catalog.           #
+######################################################################
+
+class BM25Index:
+    def __init__(self, courses=None):
+        self.postings = {}
+        self.doc_terms = []
+        self.doc_lengths = []
+        self.total_length = 0
+        self.num_docs = 0
+        for doc_id, course in enumerate(courses or []):
+            self.upsert(doc_id, course)
+
+    def upsert(self, doc_id, course):
+        """Index `course` under `doc_id`, replacing the previous document if any."""
+        self.remove(doc_id)
+        while len(self.doc_terms) <= doc_id:
+            self.doc_terms.append(None)
+            self.doc_lengths.append(0)
+
+        terms = course_terms(course)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+        self.num_docs += 1
+
+    def remove(self, doc_id):
+        if doc_id >= len(self.doc_terms) or self.doc_terms[doc_id] is None:
+            return
+        for term in self.doc_terms[doc_id]:
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths[doc_id]
+        self.num_docs -= 1
+        self.doc_terms[doc_id] = None
+        self.doc_lengths[doc_id] = 0
+
+    def search(self, query, top_n=None, candidates=None):
+        """
+        Score documents against `query` with BM25.
+
+        Args:
+            query (str): Free-text or keyword query
+            top_n (int): Number of results to keep (all matches if None)
+            candidates (set): Optional ids to restrict scoring to
+
+        Returns:
+            list: (doc_id, score) pairs ordered best first
+        """
+        if self.num_docs == 0:
+            return []
+        avg_length = self.total_length / self.num_docs
+
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:top_n] if top_n else ranked
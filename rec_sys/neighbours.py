@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import numpy as np
+
+
+# Configurations
+TOP_K = 10
+BLOCK_SIZE = 1024
+RADAR_WEIGHT = 0.2
+RADAR_KEYS = ["liked", "difficulty", "practicality", "collaborative", "rewarding", "instruction"]
+RADAR_MAX_DISTANCE = 5 * np.sqrt(len(RADAR_KEYS))  # ratings live on a 0-5 scale
+
+
+def radar_vector(course):
+    radar = course.get("radar") or course
+    return [float(radar.get(k) or 0) for k in RADAR_KEYS]
+
+
+def _normalise(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+###########################################################################
+# This function blends embedding cosine with radar closeness for a block  #
+# of rows against the whole catalog: (1 - w) * cos + w * (1 - dist / max) #
+###########################################################################
+
+def blended_similarity(embeddings, radar, rows, radar_weight=RADAR_WEIGHT):
+    cosine = embeddings[rows] @ embeddings.T
+    squared = (np.sum(radar[rows] ** 2, axis=1, keepdims=True) + np.sum(radar ** 2, axis=1)
+               - 2 * radar[rows] @ radar.T)
+    distance = np.sqrt(np.maximum(squared, 0))
+    return (1 - radar_weight) * cosine + radar_weight * (1 - distance / RADAR_MAX_DISTANCE)
+
+
+def _top_k(similarity, k):
+    k = min(k, similarity.shape[1])
+    if k == 0:
+        return np.zeros((similarity.shape[0], 0), dtype=np.int32), np.zeros((similarity.shape[0], 0), dtype=np.float16)
+    top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(top, order, axis=1).astype(np.int32), np.take_along_axis(scores, order, axis=1).astype(np.float16)
+
+
+###############################################################################
+# This defines the precomputed "similar courses" table: for every course row, #
+# the positions and scores of its top-k neighbours, stored as int32/float16.  #
+###############################################################################
+
+class NeighbourTable:
+    def __init__(self, numbers, neighbours, scores, top_k=TOP_K, radar_weight=RADAR_WEIGHT):
+        self.numbers = list(numbers)
+        self.rows = {number: row for row, number in enumerate(self.numbers)}
+        self.neighbours = neighbours
+        self.scores = scores
+        self.top_k = top_k
+        self.radar_weight = radar_weight
+
+    @classmethod
+    def compute(cls, recommender, top_k=TOP_K, block_size=BLOCK_SIZE, radar_weight=RADAR_WEIGHT):
+        """
+        Compute neighbour lists for every course in blocked matrix products.
+
+        Args:
+            recommender (CourseRecommender): Loaded recommender supplying
+                                             courses and combined embeddings
+            top_k (int): Neighbours kept per course
+            block_size (int): Rows scored per matrix product
+            radar_weight (float): Weight of radar closeness in the blend
+
+        Returns:
+            NeighbourTable: The computed table
+        """
+        embeddings = _normalise(recommender.combined_embeddings)
+        radar = np.array([radar_vector(c) for c in recommender.courses], dtype=np.float32).reshape(-1, len(RADAR_KEYS))
+        n = len(recommender.courses)
+
+        neighbours = np.zeros((n, min(top_k, max(n - 1, 0))), dtype=np.int32)
+        scores = np.zeros(neighbours.shape, dtype=np.float16)
+        for start in range(0, n, block_size):
+            rows = np.arange(start, min(start + block_size, n))
+            similarity = blended_similarity(embeddings, radar, rows, radar_weight)
+            similarity[np.arange(len(rows)), rows] = -np.inf  # a course is not its own neighbour
+            neighbours[rows], scores[rows] = _top_k(similarity, neighbours.shape[1])
+
+        numbers = [c.get("number") or c.get("course_number") for c in recommender.courses]
+        return cls(numbers, neighbours, scores, top_k=top_k, radar_weight=radar_weight)
+
+    def copy(self):
+        """Copy to refresh while this table keeps serving lookups."""
+        return NeighbourTable(self.numbers, self.neighbours.copy(), self.scores.copy(),
+                              top_k=self.top_k, radar_weight=self.radar_weight)
+
+    def lookup(self, number):
+        """Return [(neighbour number, score)] for a course number, or None if unknown."""
+        row = self.rows.get(number)
+        if row is None:
+            return None
+        return [(self.numbers[j], float(s)) for j, s in zip(self.neighbours[row], self.scores[row])]
+
+    def refresh(self, recommender, course_id):
+        """
+        Update the table after the course at `course_id` was inserted or changed.
+
+        Only the changed course's row is recomputed in full; other rows get the
+        new score spliced in, and rows that held the course and saw its score
+        drop are recomputed since a different course may now belong there.
+        """
+        embeddings = _normalise(recommender.combined_embeddings)
+        radar = np.array([radar_vector(c) for c in recommender.courses], dtype=np.float32).reshape(-1, len(RADAR_KEYS))
+        n = len(recommender.courses)
+        k = min(self.top_k, n - 1)
+
+        # Grow the table for new courses or a catalog that just passed top_k
+        if n > len(self.numbers) or k > self.neighbours.shape[1]:
+            grown = np.zeros((n, k), dtype=np.int32)
+            grown_scores = np.full((n, k), -np.inf, dtype=np.float16)
+            old_n, old_k = self.neighbours.shape
+            grown[:old_n, :old_k] = self.neighbours
+            grown_scores[:old_n, :old_k] = self.scores
+            self.neighbours, self.scores = grown, grown_scores
+        self.numbers = [c.get("number") or c.get("course_number") for c in recommender.courses]
+        self.rows = {number: row for row, number in enumerate(self.numbers)}
+
+        similarity = blended_similarity(embeddings, radar, np.array([course_id]), self.radar_weight)[0]
+        similarity[course_id] = -np.inf
+        top, top_scores = _top_k(similarity[None, :], k)
+        self.neighbours[course_id], self.scores[course_id] = top[0], top_scores[0]
+
+        if k == 0:
+            return
+
+        # Every other row at once: rows holding the course update its score
+        # in place (or are recomputed if it dropped), rows without it take
+        # it in the last slot if it now beats their weakest neighbour
+        others = np.arange(n) != course_id
+        holds = self.neighbours == course_id
+        held = holds.any(axis=1) & others
+        slot = holds.argmax(axis=1)
+        held_scores = self.scores[np.arange(n), slot].astype(np.float32)
+        dropped = held & (similarity < held_scores)
+        raised = held & ~dropped
+        inserted = ~held & others & (similarity > self.scores[:, -1])
+
+        self.scores[raised, slot[raised]] = similarity[raised]
+        self.neighbours[inserted, -1], self.scores[inserted, -1] = course_id, similarity[inserted]
+
+        touched = np.flatnonzero(raised | inserted)
+        order = np.argsort(-self.scores[touched].astype(np.float32), axis=1)
+        self.neighbours[touched] = np.take_along_axis(self.neighbours[touched], order, axis=1)
+        self.scores[touched] = np.take_along_axis(self.scores[touched], order, axis=1)
+
+        stale = np.flatnonzero(dropped)
+        if len(stale):
+            block = blended_similarity(embeddings, radar, stale, self.radar_weight)
+            block[np.arange(len(stale)), stale] = -np.inf
+            self.neighbours[stale], self.scores[stale] = _top_k(block, k)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            numbers=np.array(self.numbers),
+            neighbours=self.neighbours,
+            scores=self.scores,
+            params=np.array([self.top_k, self.radar_weight]),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as table:
+            top_k, radar_weight = table["params"].tolist()
+            return cls(table["numbers"].tolist(), table["neighbours"], table["scores"],
+                       top_k=int(top_k), radar_weight=radar_weight)
+
+
+if __name__ == "__main__":
+    from .course_recommender import CourseRecommender
+
+    parser = argparse.ArgumentParser(description="Precompute similar-course neighbour lists.")
+    parser.add_argument("output", help="Path of the .npz neighbour table to write")
+    parser.add_argument("--snapshot", help="Recommender snapshot (.npz) to read embeddings from")
+    parser.add_argument("--courses", help="Courses JSON to embed when no snapshot is given")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--radar-weight", type=float, default=RADAR_WEIGHT)
+    args = parser.parse_args()
+
+    recommender = CourseRecommender(os.getenv("OPENAI_API_KEY"))
+    if args.snapshot and os.path.exists(args.snapshot):
+        recommender.load_snapshot(args.snapshot)
+    else:
+        with open(args.courses, "r", encoding="utf-8") as f:
+            recommender.load_courses(json.load(f))
+        if args.snapshot:
+            recommender.save_snapshot(args.snapshot)
+
+    table = NeighbourTable.compute(recommender, top_k=args.top_k, block_size=args.block_size,
+                                   radar_weight=args.radar_weight)
+    table.save(args.output)
+    print(f"✔ Wrote {len(table.numbers)} neighbour lists to {args.output}")
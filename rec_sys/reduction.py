@@ -0,0 +1,166 @@
+import argparse
+import json
+import time
+import numpy as np
+
+
+# Configurations
+REDUCTION_METHODS = ("pca", "random")
+BENCH_DIMS = (128, 256, 512)
+BENCH_TOP_N = 10
+SEED = 7
+
+
+def _normalised(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+
+###########################################################################
+# This defines a linear reduction of the embedding space. It is fit on    #
+# the course matrices at load time and applied on the fly to queries      #
+# and user vectors, so every similarity is computed in `dims` dimensions. #
+###########################################################################
+
+class Reducer:
+    def __init__(self, components, method, explained_variance):
+        self.components = np.asarray(components, dtype=np.float32)
+        self.method = method
+        self.explained_variance = float(explained_variance)
+
+    @property
+    def dims(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, matrix, dims, method="pca", seed=SEED):
+        """
+        Fit a projection from the rows of `matrix` down to `dims` dimensions.
+
+        "pca" keeps the top right singular vectors of the (uncentred) matrix,
+        which preserves dot products, and so cosine rankings, as closely as
+        any rank-`dims` projection can. "random" is a seeded Gaussian
+        projection that needs no fit. explained_variance is the share of the
+        matrix's squared norm the projection keeps (close to 1 for "random" by
+        construction, so compare those by ranking recall instead).
+
+        Args:
+            matrix (np.array): Course vectors, one per row
+            dims (int): Target dimensionality (clamped to what the data supports)
+            method (str): "pca" or "random"
+            seed (int): Seed for the random projection
+
+        Returns:
+            Reducer: Fitted reducer
+        """
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction method {method!r}, expected one of {REDUCTION_METHODS}")
+        matrix = np.asarray(matrix, dtype=np.float32)
+        total = float(np.square(matrix).sum()) or 1.0
+
+        if method == "pca":
+            dims = min(dims, *matrix.shape)
+            _, singular_values, vt = np.linalg.svd(matrix, full_matrices=False)
+            components = vt[:dims].T
+            explained = float(np.square(singular_values[:dims]).sum()) / total
+        else:
+            dims = min(dims, matrix.shape[1])
+            rng = np.random.default_rng(seed)
+            components = rng.normal(size=(matrix.shape[1], dims)) / np.sqrt(dims)
+            explained = float(np.square(matrix @ components).sum()) / total
+
+        return cls(components, method, explained)
+
+    def transform(self, vectors):
+        """Project a vector or a matrix of row vectors."""
+        return np.asarray(vectors, dtype=np.float32) @ self.components
+
+    def to_arrays(self, prefix="reduction_"):
+        return {
+            f"{prefix}components": self.components,
+            f"{prefix}method": np.array(self.method),
+            f"{prefix}explained_variance": np.array(self.explained_variance),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix="reduction_"):
+        """Rebuild a reducer stored with to_arrays, or None if there isn't one."""
+        if f"{prefix}components" not in arrays:
+            return None
+        return cls(arrays[f"{prefix}components"],
+                   str(arrays[f"{prefix}method"]),
+                   float(arrays[f"{prefix}explained_variance"]))
+
+
+def synthetic_embeddings(n, dims=1536, decay=0.6, seed=SEED):
+    """Vectors with a power-law spectrum, shaped like real text embeddings of a course catalog."""
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(rng.normal(size=(dims, dims)))
+    weights = rng.normal(size=(n, dims)) * np.arange(1, dims + 1) ** -decay
+    return _normalised(weights @ basis.T).astype(np.float32)
+
+
+def benchmark(courses, queries, dims_list=BENCH_DIMS, method="pca", top_n=BENCH_TOP_N, repeat=5):
+    """
+    Compare full-dimension scoring with reduced scoring.
+
+    Returns one row per setting with the fit time, mean scoring time for the
+    whole query batch, course matrix size, explained variance and recall@top_n
+    against the full-dimension ranking.
+    """
+    def timed_scores(course_matrix, query_matrix):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scores = _normalised(query_matrix) @ _normalised(course_matrix).T
+            top = np.argpartition(-scores, top_n, axis=1)[:, :top_n]
+            best = min(best, time.perf_counter() - start)
+        return top, best
+
+    full_top, full_time = timed_scores(courses, queries)
+    rows = [{"dims": courses.shape[1], "method": "full", "fit_ms": 0.0, "score_ms": full_time * 1000,
+             "matrix_mb": courses.nbytes / 2**20, "explained_variance": 1.0, "recall": 1.0}]
+
+    for dims in dims_list:
+        start = time.perf_counter()
+        reducer = Reducer.fit(courses, dims, method=method)
+        fit_time = time.perf_counter() - start
+        reduced_courses = reducer.transform(courses)
+        top, score_time = timed_scores(reduced_courses, reducer.transform(queries))
+        recall = np.mean([len(set(a) & set(b)) / top_n for a, b in zip(top, full_top)])
+        rows.append({"dims": reducer.dims, "method": method, "fit_ms": fit_time * 1000,
+                     "score_ms": score_time * 1000, "matrix_mb": reduced_courses.nbytes / 2**20,
+                     "explained_variance": reducer.explained_variance, "recall": float(recall)})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency / quality trade-off of reduced course embeddings.")
+    parser.add_argument("--snapshot", help="Recommender snapshot (.npz); synthetic vectors are used without one")
+    parser.add_argument("--courses", type=int, default=3000, help="Synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries scored per batch")
+    parser.add_argument("--method", choices=REDUCTION_METHODS, default="pca")
+    parser.add_argument("--dims", type=int, nargs="+", default=list(BENCH_DIMS))
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        with np.load(args.snapshot) as snapshot:
+            content_weight, experience_weight = snapshot["weights"].tolist()
+            course_matrix = (snapshot["content_embeddings"] * content_weight +
+                             snapshot["experience_embeddings"] * experience_weight).astype(np.float32)
+        # Perturbed course vectors stand in for queries
+        rng = np.random.default_rng(SEED)
+        picks = course_matrix[rng.integers(len(course_matrix), size=args.queries)]
+        query_matrix = picks + 0.5 * rng.normal(size=picks.shape).astype(np.float32) * picks.std()
+    else:
+        vectors = synthetic_embeddings(args.courses + args.queries)
+        course_matrix, query_matrix = vectors[:args.courses], vectors[args.courses:]
+
+    rows = benchmark(course_matrix, query_matrix, dims_list=args.dims, method=args.method)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'dims':>6} {'method':>7} {'fit ms':>9} {'score ms':>9} {'MB':>7} {'variance':>9} {'recall':>7}")
+        for row in rows:
+            print(f"{row['dims']:>6} {row['method']:>7} {row['fit_ms']:>9.1f} {row['score_ms']:>9.2f} "
+                  f"{row['matrix_mb']:>7.1f} {row['explained_variance']:>9.3f} {row['recall']:>7.3f}")
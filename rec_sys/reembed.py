@@ -0,0 +1,193 @@
+import threading
+import time
+import traceback
+import numpy as np
+from .course_recommender import CourseRecommender
+from .index_builder import ActiveIndex
+from .neighbours import NeighbourTable
+
+
+# Configurations
+REEMBED_RATE = 20  # courses re-embedded per second; each costs two texts
+REEMBED_BATCH = 16  # courses per batched embeddings request
+COMPARE_TOP_N = 10
+
+
+def ranking_overlap(old, new, top_n=COMPARE_TOP_N):
+    """Share of the top_n course numbers two rankings have in common."""
+    old_numbers = {c.get("number") or c.get("course_number") for c in old[:top_n]}
+    new_numbers = {c.get("number") or c.get("course_number") for c in new[:top_n]}
+    return len(old_numbers & new_numbers) / max(len(old_numbers), 1)
+
+
+###########################################################################
+# This defines a background migration to a new embedding model. Courses   #
+# are re-embedded at a throttled rate into a shadow index while queries   #
+# keep reading the active one. Once the shadow is complete the two can be #
+# compared on sample queries, and cutover() hands it over for the swap.   #
+###########################################################################
+
+class ReembedMigration:
+    def __init__(self, rate=REEMBED_RATE, batch_size=REEMBED_BATCH):
+        self.rate = rate
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.shadow = None
+        self.pending_upserts = []
+        self.state = {"status": "idle", "model": None, "source_model": None, "done": 0, "total": 0,
+                      "started_at": None, "finished_at": None, "error": None}
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, source, model, rate=None):
+        """
+        Start re-embedding `source`'s catalog with `model` into a shadow index.
+
+        Rows already embedded with `model` are copied rather than re-embedded,
+        so a migration that was cancelled can be restarted cheaply.
+
+        Args:
+            source (ActiveIndex): Index currently serving queries
+            model (str): Target embedding model
+            rate (float): Courses per second (defaults to the configured rate)
+
+        Returns:
+            bool: False if a migration is already running
+        """
+        with self.lock:
+            if self.running():
+                return False
+            if rate:
+                self.rate = rate
+            self.cancelled.clear()
+            self.shadow = None
+            self.pending_upserts = []
+            self.state = {"status": "running", "model": model, "source_model": source.recommender.embedding_model,
+                          "done": 0, "total": None,
+                          "started_at": time.time(), "finished_at": None, "error": None}
+            self.thread = threading.Thread(target=self._run, args=(source.recommender, model),
+                                           name="reembed-migration", daemon=True)
+            self.thread.start()
+            return True
+
+    def _run(self, source, model):
+        try:
+            shadow = CourseRecommender(source.openai_api_key, embedding_cache=source.embedding_cache,
+                                       reduction_dims=source.reduction_dims,
+                                       reduction_method=source.reduction_method, embedding_model=model)
+            courses = list(source.courses)
+            content = np.array(source.content_embeddings, dtype=np.float32)
+            experience = np.array(source.experience_embeddings, dtype=np.float32)
+            stale = source.stale_embeddings(model)
+            self.state["total"] = len(stale)
+
+            for start in range(0, len(stale), self.batch_size):
+                if self.cancelled.is_set():
+                    raise RuntimeError("Migration cancelled")
+                began = time.monotonic()
+                rows = stale[start:start + self.batch_size]
+                texts = []
+                for i in rows:
+                    texts += [courses[i]["content_summary"], courses[i]["experience_summary"]]
+                vectors = np.array(shadow._get_embeddings(texts), dtype=np.float32)
+                # A new model may change the width; every row is stale then
+                if vectors.shape[1] != content.shape[1]:
+                    content = np.zeros((len(courses), vectors.shape[1]), dtype=np.float32)
+                    experience = np.zeros_like(content)
+                content[rows] = vectors[0::2]
+                experience[rows] = vectors[1::2]
+                self.state["done"] = start + len(rows)
+
+                # Throttle to the configured courses-per-second rate
+                time.sleep(max(0.0, len(rows) / self.rate - (time.monotonic() - began)))
+
+            shadow.load_embeddings(courses, content, experience,
+                                   content_weight=source.content_weight,
+                                   experience_weight=source.experience_weight)
+            table = NeighbourTable.compute(shadow)
+
+            with self.lock:
+                # Writes that reached the active index while we were re-embedding
+                for course in self.pending_upserts:
+                    course_id = shadow.upsert_course(course)
+                    table.refresh(shadow, course_id)
+                self.pending_upserts = []
+                self.shadow = ActiveIndex(shadow, table)
+                self.state.update(status="ready", finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            with self.lock:
+                self.pending_upserts = []
+                self.state.update(status="cancelled" if self.cancelled.is_set() else "failed",
+                                  finished_at=time.time(), error=str(e))
+
+    def prepare_upsert(self, course):
+        """
+        Embed an upserted course with the shadow's model ahead of
+        record_upsert, without the lock; the vectors land in the shared
+        embedding cache, so record_upsert makes no API calls under the lock.
+        """
+        shadow = self.shadow
+        if shadow is not None and shadow.recommender.embedding_cache is not None:
+            shadow.recommender.embed_course(course)
+
+    def record_upsert(self, course):
+        """
+        Mirror an upsert into the shadow index. Call with self.lock held.
+
+        Decided on state rather than thread liveness: the worker publishes
+        the shadow and flips the status under the same lock, so an upsert
+        is either queued for the replay or applied to the shadow, never lost.
+        """
+        if self.shadow is None and self.state["status"] == "running":
+            self.pending_upserts.append(course)
+        elif self.shadow is not None:
+            course_id = self.shadow.recommender.upsert_course(course)
+            self.shadow.neighbour_table.refresh(self.shadow.recommender, course_id)
+
+    def compare(self, active, queries, top_n=COMPARE_TOP_N, mode="dense"):
+        """
+        Rank sample queries with both indexes before switching.
+
+        Returns:
+            dict: Mean top_n overlap and per-query rankings (course numbers)
+        """
+        if self.shadow is None:
+            raise RuntimeError("No shadow index is ready to compare")
+        rows = []
+        for query in queries:
+            old = active.recommender.recommend(query, top_n=top_n, mode=mode)
+            new = self.shadow.recommender.recommend(query, top_n=top_n, mode=mode)
+            rows.append({
+                "query": query,
+                "overlap": ranking_overlap(old, new, top_n),
+                "active": [c.get("number") or c.get("course_number") for c in old],
+                "shadow": [c.get("number") or c.get("course_number") for c in new],
+            })
+        return {
+            "active_model": active.recommender.embedding_model,
+            "shadow_model": self.shadow.recommender.embedding_model,
+            "mean_overlap": float(np.mean([row["overlap"] for row in rows])) if rows else None,
+            "queries": rows,
+        }
+
+    def cutover(self):
+        """Hand over the finished shadow index (call with self.lock held) and reset."""
+        if self.shadow is None:
+            raise RuntimeError("No shadow index is ready to cut over to")
+        shadow, self.shadow = self.shadow, None
+        self.state.update(status="cut_over", finished_at=time.time())
+        return shadow
+
+    def cancel(self, reason="Migration cancelled"):
+        """Stop a running migration and drop any finished shadow."""
+        self.cancelled.set()
+        self.shadow = None
+        if not self.running() and self.state["status"] == "ready":
+            self.state.update(status="cancelled", error=reason, finished_at=time.time())
+
+    def status(self):
+        return dict(self.state, rate=self.rate)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+# Configurations
+MAX_ENTRIES = 4096
+
+
+def fingerprint(value):
+    """Stable digest of a user profile, embedding, filters dict or catalog."""
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value, dtype=np.float32).tobytes()
+    else:
+        data = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+########################################################################
+# This defines a bounded LRU cache for recommendation results. Entries #
+# can be tagged with a user id so a profile update drops only that     #
+# user's results, while a catalog change clears everything.            #
+########################################################################
+
+class ResultCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, key, results, tag=None):
+        with self.lock:
+            self.entries[key] = (list(results), tag)
+            self.entries.move_to_end(key)
+            if tag is not None:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                old_key, (_, old_tag) = self.entries.popitem(last=False)
+                self._untag(old_key, old_tag)
+
+    def _untag(self, key, tag):
+        keys = self.tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.tags[tag]
+
+    def invalidate_user(self, tag):
+        """Drop every result cached for one user (profile update hook)."""
+        with self.lock:
+            for key in self.tags.pop(tag, set()):
+                self.entries.pop(key, None)
+
+    def invalidate_catalog(self):
+        """Drop everything (course upsert / catalog reload hook)."""
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+# Shared by the recommender pipeline in this process
+default_result_cache = ResultCache()
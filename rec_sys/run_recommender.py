@@ -1,14 +1,27 @@
 import os
 from dotenv import load_dotenv
 from .course_recommender import CourseRecommender
-from .sample_data import COURSES, SAMPLE_USER
 from .filter import filter_taken, filter_major
-from .generate_preferences import generate_user_preference_summary, get_course
+from .course_index import CourseIndex
 from .digraph import build_course_graph
 
 
 
-def recommend(user, courses, course_graph, method="preference", top_n=3):
+def load_catalog(api_key, courses):
+    """
+    Recommender over the full catalog. Summaries are embedded once (cached
+    texts cost nothing), so top classes the user already took still have
+    stored vectors to compose from.
+    """
+    # Throwaway recommender: its catalog_version is fresh every call, so
+    # caching its results would only evict entries that can be hit
+    recommender = CourseRecommender(api_key, result_cache=None)
+    recommender.load_courses(courses)
+    return recommender
+
+
+def recommend(user, courses, course_graph, method="preference", top_n=3, index=None, embedding="llm",
+              catalog=None):
 
     load_dotenv()
     api_key = os.getenv('OPENAI_API_KEY')
@@ -16,23 +29,42 @@ def recommend(user, courses, course_graph, method="preference", top_n=3):
         # print("Error: OPENAI_API_KEY not found in .env file")
         return
     
-    # Initialize the recommender
-    recommender = CourseRecommender(api_key)
+    # merge() passes one catalog recommender for both passes
+    if catalog is None:
+        catalog = load_catalog(api_key, courses)
+
+    # One index for both filters; merge() passes its own so both passes share it
+    if index is None:
+        index = CourseIndex(courses)
 
     # preliminary filtering
-    allowed = filter_taken(user, courses, course_graph)
+    allowed = filter_taken(user, courses, course_graph, index=index)
 
     # if recommending by major
     if method == "major":
         # filter by major
-        allowed = filter_major(user["major"], allowed)
+        allowed = filter_major(user["major"], allowed, index=index)
+    if not allowed:
+        return []
     
-    recommender.load_courses(allowed)
-
-    user_preference = generate_user_preference_summary(user, courses)
-    # print(f"User Preference: {user_preference}")
-
-    user_embedding = recommender.onboard_user(user_preference)
+    # "compose" skips the Gemini summary and builds the vector from stored embeddings
+    if embedding == "compose":
+        user_embedding = catalog.compose_user_embedding(user, courses=courses)
+    else:
+        # Imported lazily: the Gemini client is only needed for LLM summaries
+        from .generate_preferences import generate_user_preference_summary
+
+        user_preference = generate_user_preference_summary(user, courses)
+        # print(f"User Preference: {user_preference}")
+
+        user_embedding = catalog.onboard_user(user_preference)
+
+    # Score only the allowed courses, sliced from the catalog matrices
+    rows = [catalog.index.lookup(course["number"]) for course in allowed]
+    recommender = CourseRecommender(api_key, result_cache=None)
+    recommender.load_embeddings(allowed, catalog.content_embeddings[rows], catalog.experience_embeddings[rows],
+                                content_weight=catalog.content_weight,
+                                experience_weight=catalog.experience_weight)
     user_recommendations = recommender.recommend_for_user(user_embedding, top_n=top_n)
     
     
@@ -49,9 +81,15 @@ def re_rank(user, courses):
     return courses
 
 
-def merge(user, courses, course_graph, top_n=3):
-    by_major = re_rank(user, recommend(user, courses, course_graph, method="major", top_n=top_n))
-    by_preference = re_rank(user, recommend(user, courses, course_graph, method="preference", top_n=top_n))
+def merge(user, courses, course_graph, top_n=3, embedding="llm"):
+    # Parse course numbers and embed the catalog once for both passes
+    index = CourseIndex(courses)
+    load_dotenv()
+    api_key = os.getenv('OPENAI_API_KEY')
+    catalog = load_catalog(api_key, courses) if api_key else None
+
+    by_major = re_rank(user, recommend(user, courses, course_graph, method="major", top_n=top_n, index=index, embedding=embedding, catalog=catalog))
+    by_preference = re_rank(user, recommend(user, courses, course_graph, method="preference", top_n=top_n, index=index, embedding=embedding, catalog=catalog))
 
     combined_scores = {}
 
@@ -65,9 +103,11 @@ def merge(user, courses, course_graph, top_n=3):
     merged = sorted(combined_scores.keys(), key=lambda x: combined_scores.get(x), reverse=True)
     # print(f"Recommended Courses: {merged}")
 
-    return [get_course(course, courses) for course in merged[:top_n]]
+    return [courses[index.lookup(course)] for course in merged[:top_n]]
 
 if __name__ == "__main__":
+    from .sample_data import COURSES, SAMPLE_USER
+
     merge(SAMPLE_USER, COURSES, build_course_graph(COURSES), top_n=3)
 
     
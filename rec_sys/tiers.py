@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .neighbours import radar_vector, RADAR_KEYS
+
+
+# Configurations
+DEFAULT_BUDGET_MS = 800
+SCORING_RESERVE_MS = 50  # kept back from the budget for the final scoring pass
+POPULARITY_WEIGHT = 0.3
+
+# Cheapest last; the response reports which one served it
+TIERS = ["full", "cached_vector", "centroid", "radar_popularity"]
+
+FULL_TIER_WORKERS = 4
+MAX_PENDING_FULL = 16  # running + queued full-tier jobs; requests beyond this skip the tier
+
+_executor = ThreadPoolExecutor(max_workers=FULL_TIER_WORKERS, thread_name_prefix="rec-full-tier")
+_slots = threading.BoundedSemaphore(MAX_PENDING_FULL)
+_pending_lock = threading.Lock()
+_pending = {}  # user_id -> future of the full-tier job still running for that user
+
+
+def _full_embedding(recommender, user, courses):
+    # Imported lazily: the Gemini client is only needed by this tier
+    from .generate_preferences import generate_user_preference_summary
+
+    summary = generate_user_preference_summary(user, courses, delay=0)
+    if summary.startswith("Gemini Error"):
+        raise RuntimeError(summary)
+    return recommender.onboard_user(summary)
+
+
+def _submit_full(recommender, user, courses, on_embedding):
+    """
+    Start (or join) the full-tier job for a user.
+
+    At most one job runs per user; a repeat request waits on the pending
+    one. When MAX_PENDING_FULL jobs are already running or queued the
+    request is shed and None is returned, so a slow upstream can't pile
+    up an unbounded queue behind the executor.
+    """
+    tag = user.get("user_id")
+    with _pending_lock:
+        if tag is not None and tag in _pending:
+            return _pending[tag]
+        if not _slots.acquire(blocking=False):
+            return None
+        future = _executor.submit(_full_embedding, recommender, user, courses)
+        if tag is not None:
+            _pending[tag] = future
+
+    def finished(f):
+        with _pending_lock:
+            if _pending.get(tag) is f:
+                del _pending[tag]
+        _slots.release()
+        if on_embedding is not None and f.exception() is None:
+            on_embedding(f.result())
+
+    future.add_done_callback(finished)
+    return future
+
+
+def radar_popularity(recommender, user, filters=None, top_n=5):
+    """Rank by radar affinity plus popularity; needs no embeddings at all."""
+    indices = list(recommender._apply_filters(filters) if filters else range(len(recommender.courses)))
+    if not indices:
+        return []
+
+    radar = user.get("radar") or {}
+    preferences = np.array([float(radar.get(k) or 0) for k in RADAR_KEYS])
+    courses = [recommender.courses[i] for i in indices]
+    affinity = np.array([radar_vector(c) for c in courses]) @ preferences
+    popularity = np.array([float(c.get("popularity", radar_vector(c)[0]) or 0) for c in courses])
+
+    scores = affinity / (affinity.max() or 1) + POPULARITY_WEIGHT * popularity / (popularity.max() or 1)
+    order = np.argsort(-scores)[:top_n]
+    return [courses[i] for i in order]
+
+
+#########################################################################
+# This function serves recommendations within a latency budget, falling #
+# back from the LLM + embedding path to progressively cheaper tiers.    #
+#########################################################################
+
+def recommend_within_budget(recommender, user, budget_ms=DEFAULT_BUDGET_MS, cached_embedding=None,
+                            cached_version=None, on_embedding=None, filters=None, top_n=5, courses=None):
+    """
+    Recommend for a user without exceeding `budget_ms` on upstream calls.
+
+    Tiers, tried in order:
+        full             - Gemini summary + embedding, if it lands in time
+        cached_vector    - the embedding stored from an earlier onboarding
+        centroid         - composed from stored top-class vectors, no calls
+        radar_popularity - radar affinity plus popularity, no embeddings
+
+    A full-tier call that misses the deadline keeps running in the
+    background and hands its embedding to `on_embedding`, so the next
+    request can be served from the cached_vector tier. The full tier is
+    skipped when the cached embedding was computed for the user's current
+    profile_version, and it is never run twice at once for one user.
+
+    Args:
+        recommender (CourseRecommender): Loaded recommender
+        user (dict): User profile (user_id, profile_version, major, goal_description, radar, ...)
+        budget_ms (int): Total latency budget in milliseconds
+        cached_embedding (np.array): Previously stored user embedding, if any
+        cached_version (int): profile_version the cached embedding was computed for
+        on_embedding (callable): Receives the full-tier embedding when it completes
+        filters (dict): Optional filters to apply to results
+        top_n (int): Number of top results to return
+        courses (list): Full catalog for top-class lookups (defaults to the loaded one)
+
+    Returns:
+        tuple: (recommendations, tier name)
+    """
+    deadline = time.monotonic() + budget_ms / 1000
+    courses = courses or recommender.courses
+    tag = user.get("user_id")
+
+    fresh = (cached_embedding is not None and cached_version is not None
+             and cached_version == user.get("profile_version"))
+
+    future = None if fresh else _submit_full(recommender, user, courses, on_embedding)
+    if future is not None:
+        try:
+            timeout = max(0, deadline - time.monotonic() - SCORING_RESERVE_MS / 1000)
+            embedding = future.result(timeout=timeout)
+            return recommender.recommend_for_user(embedding, filters=filters, top_n=top_n, cache_tag=tag), "full"
+        except Exception:
+            # Deadline passed or the upstream call failed; degrade
+            pass
+
+    if cached_embedding is not None:
+        embedding = np.asarray(cached_embedding)
+        return recommender.recommend_for_user(embedding, filters=filters, top_n=top_n, cache_tag=tag), "cached_vector"
+
+    if user.get("top_classes"):
+        try:
+            embedding = recommender.compose_user_embedding(user, courses=courses, offline=True)
+            return recommender.recommend_for_user(embedding, filters=filters, top_n=top_n, cache_tag=tag), "centroid"
+        except ValueError:
+            pass
+
+    return radar_popularity(recommender, user, filters=filters, top_n=top_n), "radar_popularity"